@@ -0,0 +1,101 @@
+# Stress test for one parser shared between threads, the way a threaded web
+# server uses it. A local stand-in for Wiktionary serves the corpus with a fixed
+# delay per request, and the same number of distinct words is looked up with an
+# increasing number of threads. Every run is checked against the single-thread
+# results before its throughput is reported:
+#
+#   python benchmarks/concurrency.py
+#   python benchmarks/concurrency.py --threads 1 4 16 --words 800 --latency 0.02
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.inflection import CORPUS, WORDS
+from yawp.dict import serbocroatian
+from yawp.parser import YAWiktionaryParser
+
+
+class StandIn(BaseHTTPRequestHandler):
+    # Answers /wiki/<word><n>?action=raw with the corpus page for <word>
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+    latency = 0.0
+    texts = {}
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        title = unquote(urlsplit(self.path).path.rsplit('/', 1)[-1])
+        text = self.texts.get(title.rstrip('0123456789'))
+        body = text.encode('utf-8') if text is not None else b''
+        self.send_response(200 if text is not None else 404)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def start_server(latency):
+    StandIn.latency = latency
+    StandIn.texts = {word: open(os.path.join(CORPUS, word + '.txt'), encoding='utf-8').read() for word in WORDS}
+    server = Server(('127.0.0.1', 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(parser, words, threads):
+    # Memoized results from an earlier run would hide the fetches
+    serbocroatian.invalidate()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda word: serbocroatian.get(word, parser), words))
+    return time.perf_counter() - start, results
+
+
+def summary(results):
+    return [[definition.to_dict() for definition in definitions or []] for definitions in results]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--words', type=int, default=400)
+    parser.add_argument('--latency', type=float, default=0.01, help='seconds the stand-in waits per request')
+    args = parser.parse_args()
+
+    server = start_server(args.latency)
+    words = ['{0}{1}'.format(WORDS[i % len(WORDS)], i) for i in range(args.words)]
+    # One long-lived parser for every run, as a web server would hold it
+    with YAWiktionaryParser(base_url='http://127.0.0.1:{0}'.format(server.server_port), pool_size=max(args.threads)) as wiktionary:
+        expected = None
+        base = None
+        for threads in args.threads:
+            elapsed, results = run(wiktionary, words, threads)
+            if expected is None:
+                expected = summary(results)
+                base = elapsed
+            elif summary(results) != expected:
+                raise SystemExit('{0} threads returned different definitions'.format(threads))
+            print('{0:3d} threads {1:8.2f} s {2:8.0f} words/s {3:6.1f}x'.format(
+                threads, elapsed, len(words) / elapsed, base / elapsed))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
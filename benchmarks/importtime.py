@@ -0,0 +1,104 @@
+# Guards import-time cost. Each scenario runs in a fresh interpreter under
+# `python -X importtime`; the script reports how long the imports it triggered
+# took and fails if a scenario loaded a module it should never need, such as
+# the HTTP stack on a lexicon-only or cache-only path:
+#
+#   python benchmarks/importtime.py
+#   python benchmarks/importtime.py --repeat 10 --show 15
+import argparse
+import compileall
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.inflection import CORPUS, WORDS
+
+HTTP = ['requests', 'urllib3', 'http.client', 'ssl']
+
+# name -> (code to run, modules it must not import)
+SCENARIOS = {
+    'import': ('import yawp.dict.serbocroatian',
+               HTTP + ['asyncio', 'json', 'sqlite3', 'xml.etree.ElementTree', 'concurrent.futures.process']),
+    'cli': ('import yawp.cli',
+            HTTP + ['asyncio', 'json', 'sqlite3']),
+    'lexicon': ('from yawp.dict import serbocroatian\n'
+                'serbocroatian.load_lexicon({lexicon!r})\n'
+                'serbocroatian.get("voda")',
+                HTTP + ['asyncio', 'json', 'sqlite3']),
+    'cache': ('from yawp.cache import RawCache\n'
+              'from yawp.dict import serbocroatian\n'
+              'from yawp.parser import YAWiktionaryParser\n'
+              'serbocroatian.get("voda", YAWiktionaryParser(cache=RawCache({cache!r})))',
+              HTTP + ['asyncio', 'json']),
+}
+
+
+def prepare(directory):
+    # A lexicon and a raw cache holding the corpus pages, for the offline scenarios
+    from yawp.cache import RawCache
+    from yawp.dict import serbocroatian
+    from yawp.lexicon import LexiconWriter
+    from yawp.parser import Entry
+
+    paths = {'lexicon': os.path.join(directory, 'corpus.lex'), 'cache': os.path.join(directory, 'corpus.db')}
+    cache = RawCache(paths['cache'])
+    with LexiconWriter(paths['lexicon']) as writer:
+        for word in WORDS:
+            text = open(os.path.join(CORPUS, word + '.txt'), encoding='utf-8').read()
+            cache.put('en', word, text)
+            writer.add(word, serbocroatian.parse_term(Entry(text, word).term(serbocroatian.LANG_NAME)))
+    cache.close()
+    return paths
+
+
+def run(code):
+    # Returns [(module, self us, cumulative us, depth)] for imports made after startup
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=ROOT, env=env, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        if name.strip() == 'site' and depth == 0:
+            # Everything before this was interpreter startup
+            imports = []
+            continue
+        imports.append((name.strip(), int(own), int(cumulative), depth))
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5, help='runs per scenario; the fastest is kept')
+    parser.add_argument('--show', type=int, default=0, help='list the N slowest imports of each scenario')
+    args = parser.parse_args()
+
+    # Time imports from bytecode, as an installed package would be
+    compileall.compile_dir(os.path.join(ROOT, 'yawp'), quiet=1)
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        paths = prepare(directory)
+        for name, (code, forbidden) in SCENARIOS.items():
+            runs = [run(code.format(**paths)) for _ in range(args.repeat)]
+            imports = min(runs, key=lambda imports: sum(c for _, _, c, depth in imports if depth == 0))
+            total = sum(cumulative for _, _, cumulative, depth in imports if depth == 0)
+            loaded = [module for module in forbidden if module in {m for m, _, _, _ in imports}]
+            print('{0:10s} {1:8.1f} ms {2:4d} modules{3}'.format(
+                name, total / 1000, len(imports), '  loaded ' + ', '.join(loaded) if loaded else ''))
+            for module, own, cumulative, depth in sorted(imports, key=lambda i: -i[2])[:args.show]:
+                print('    {0:8.1f} ms  {1}'.format(cumulative / 1000, module))
+            if loaded:
+                failures.append(name)
+    if failures:
+        raise SystemExit('modules loaded that should not be: {0}'.format(', '.join(failures)))
+
+
+if __name__ == '__main__':
+    main()
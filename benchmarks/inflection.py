@@ -0,0 +1,53 @@
+# Times building Definitions (and so their inflection tables) for the corpus
+# verb, noun and adjective. Pass a git revision to compare against the
+# serbocroatian module as it was in that revision:
+#
+#   python benchmarks/inflection.py
+#   python benchmarks/inflection.py --against 8fe50bb
+import argparse
+import os
+import subprocess
+import sys
+import timeit
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from yawp.dict import serbocroatian
+from yawp.parser import Entry
+
+CORPUS = os.path.join(ROOT, 'benchmarks', 'corpus')
+WORDS = ['pisati', 'voda', 'dobar']
+
+
+def load_revision(revision):
+    source = subprocess.check_output(['git', 'show', '{0}:yawp/dict/serbocroatian.py'.format(revision)], cwd=ROOT)
+    module = types.ModuleType('serbocroatian_' + revision)
+    exec(compile(source, 'serbocroatian@' + revision, 'exec'), module.__dict__)
+    return module
+
+
+def time_definitions(module, term, number=2000):
+    return min(timeit.repeat(lambda: module.parse_term(term), number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--against', help='git revision to compare with')
+    args = parser.parse_args()
+
+    other = load_revision(args.against) if args.against else None
+    for word in WORDS:
+        text = open(os.path.join(CORPUS, word + '.txt'), encoding='utf-8').read()
+        term = Entry(text, word, lazy=True).term(serbocroatian.LANG_NAME)
+        definitions = serbocroatian.parse_term(term)
+        line = '{0:8s} {1:4d} forms  current: {2:7.1f} us'.format(
+            word, sum(len(d.inflection) for d in definitions), time_definitions(serbocroatian, term) * 1e6)
+        if other:
+            line += '  {0}: {1:7.1f} us'.format(args.against, time_definitions(other, term) * 1e6)
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
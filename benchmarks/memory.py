@@ -0,0 +1,58 @@
+# Measures the memory held by 100k parsed Definitions (a third each verbs,
+# nouns and adjectives from the corpus, every word made distinct). Pass a git
+# revision to measure the serbocroatian module from that revision as well:
+#
+#   python benchmarks/memory.py
+#   python benchmarks/memory.py --against 8fe50bb
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.inflection import CORPUS, WORDS, load_revision
+from yawp.dict import serbocroatian
+from yawp.parser import Entry
+
+
+def load_terms(count):
+    texts = {word: open(os.path.join(CORPUS, word + '.txt'), encoding='utf-8').read() for word in WORDS}
+    for i in range(count):
+        word = WORDS[i % len(WORDS)]
+        # A distinct lemma per definition so no inflected form strings are shared
+        text = texts[word].replace(word[:-2], '{0}{1}'.format(word[:-2], i))
+        yield Entry(text, '{0}{1}'.format(word, i), lazy=True).term(serbocroatian.LANG_NAME)
+
+
+def measure(module, count):
+    gc.collect()
+    tracemalloc.start()
+    definitions = []
+    for term in load_terms(count):
+        definitions.extend(module.parse_term(term))
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(definitions), size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--against', help='git revision to compare with')
+    parser.add_argument('--count', type=int, default=100000)
+    args = parser.parse_args()
+
+    modules = [('current', serbocroatian)]
+    if args.against:
+        modules.append((args.against, load_revision(args.against)))
+    for name, module in modules:
+        definitions, size = measure(module, args.count)
+        print('{0:10s} {1} definitions: {2:8.1f} MiB ({3:.0f} bytes each)'.format(
+            name, definitions, size / 2 ** 20, size / definitions))
+
+
+if __name__ == '__main__':
+    main()
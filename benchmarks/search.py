@@ -0,0 +1,89 @@
+# Builds a search index over the forms of --count distinct lemmas made from
+# the corpus words and times exact, prefix and fuzzy queries against it:
+#
+#   python benchmarks/search.py
+#   python benchmarks/search.py --count 20000 --queries 2000
+import argparse
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.inflection import CORPUS, WORDS
+from yawp.dict import serbocroatian
+from yawp.parser import Entry
+
+
+def _stem(i):
+    # 0 -> 'a', 25 -> 'z', 26 -> 'ba': letters keep the trie's fan-out realistic
+    letters = ''
+    while True:
+        i, letter = divmod(i, 26)
+        letters = string.ascii_lowercase[letter] + letters
+        if not i:
+            return letters
+
+
+def load_entries(count):
+    texts = {word: open(os.path.join(CORPUS, word + '.txt'), encoding='utf-8').read() for word in WORDS}
+    for i in range(count):
+        word = WORDS[i % len(WORDS)]
+        stem = word[:-2] + _stem(i // len(WORDS))
+        term = Entry(texts[word].replace(word[:-2], stem), stem + word[-2:], lazy=True).term(serbocroatian.LANG_NAME)
+        yield term.word, serbocroatian.parse_term(term)
+
+
+def typo(word, rng):
+    i = rng.randrange(len(word))
+    return word[:i] + rng.choice('aeiou') + word[i + 1:]
+
+
+def timed(queries, func):
+    # Median and 99th percentile in microseconds
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2] * 1e6, times[int(len(times) * 0.99)] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=10000, help='distinct lemmas to index')
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'forms.trie')
+        entries = list(load_entries(args.count))
+        start = time.perf_counter()
+        index = serbocroatian.build_search(path, entries)
+        print('built {0} forms in {1:.1f} s, {2:.1f} MiB'.format(
+            len(index), time.perf_counter() - start, os.path.getsize(path) / 2 ** 20))
+
+        forms = [rng.choice(entries)[0] for _ in range(args.queries)]
+        typos = [typo(form, rng) for form in forms]
+        cases = [
+            ('exact', forms, index.lookup),
+            ('prefix 3', [form[:3] for form in forms], lambda q: index.prefix(q, 20)),
+            ('prefix 5', [form[:5] for form in forms], lambda q: index.prefix(q, 20)),
+            ('fuzzy 1', typos, lambda q: index.fuzzy(q, 1, 20)),
+            ('fuzzy 2', typos, lambda q: index.fuzzy(q, 2, 20)),
+        ]
+        for name, queries, func in cases:
+            median, p99 = timed(queries, func)
+            print('{0:10s} median {1:8.1f} us   p99 {2:8.1f} us'.format(name, median, p99))
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# Serializes and loads parsed definitions three ways: the old toJSON() array,
+# JSON Lines and the length-prefixed binary records.
+#
+#   python benchmarks/serialization.py --count 100000
+import argparse
+import json
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import deque
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.memory import load_terms
+from yawp.dict import serbocroatian
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=100000)
+    args = parser.parse_args()
+
+    definitions = []
+    for term in load_terms(args.count):
+        definitions.extend(serbocroatian.parse_term(term))
+    directory = tempfile.mkdtemp()
+    paths = {name: os.path.join(directory, name) for name in ('array.json', 'definitions.jsonl', 'definitions.bin')}
+
+    def write_array():
+        with open(paths['array.json'], 'w', encoding='utf-8') as fp:
+            fp.write('[' + ','.join(d.toJSON() for d in definitions) + ']')
+
+    def write_jsonl():
+        with open(paths['definitions.jsonl'], 'w', encoding='utf-8') as fp:
+            serbocroatian.write_jsonl(definitions, fp)
+
+    def write_records():
+        with open(paths['definitions.bin'], 'wb') as fp:
+            serbocroatian.write_records(definitions, fp)
+
+    def load_array():
+        with open(paths['array.json'], encoding='utf-8') as fp:
+            json.load(fp)
+
+    def load_jsonl():
+        with open(paths['definitions.jsonl'], encoding='utf-8') as fp:
+            deque(serbocroatian.read_jsonl(fp), maxlen=0)
+
+    def load_records():
+        with open(paths['definitions.bin'], 'rb') as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            deque(serbocroatian.read_records(buffer), maxlen=0)
+
+    print('{0} definitions'.format(len(definitions)))
+    rows = [
+        ('toJSON array (dicts only)', timed(write_array), timed(load_array), paths['array.json']),
+        ('JSON Lines', timed(write_jsonl), timed(load_jsonl), paths['definitions.jsonl']),
+        ('binary records', timed(write_records), timed(load_records), paths['definitions.bin']),
+    ]
+    for name, write, load, path in rows:
+        print('{0:26s} write {1:6.2f} s  load {2:6.2f} s  {3:7.1f} MiB'.format(name, write, load, os.path.getsize(path) / 2 ** 20))
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+# Benchmark suite for the hot paths, run offline over the recorded pages in
+# benchmarks/corpus. Fetches go through CorpusTransport, a requests adapter
+# that answers /wiki/<title>?action=raw and api.php queries from the corpus, so
+# the whole requests stack runs but nothing leaves the machine.
+#
+# Every stage reports its latency per page, pages/sec and the peak memory
+# traced while it ran once over the corpus, and is compared with the stored
+# baseline. The baseline is machine specific; refresh it with --save after
+# changing hardware or Python version:
+#
+#   python benchmarks/suite.py
+#   python benchmarks/suite.py --stage definitions --stage to_json
+#   python benchmarks/suite.py --save
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+from urllib.parse import parse_qs, unquote, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from yawp import serialize
+from yawp.dict import serbocroatian
+from yawp.parser import Entry, YAWiktionaryParser
+
+CORPUS = os.path.join(ROOT, 'benchmarks', 'corpus')
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+
+class CorpusTransport(BaseAdapter):
+    # Serves recorded wikitext in place of Wiktionary
+
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = pages
+        self.requests = 0
+
+    def send(self, request, **kwargs):
+        self.requests += 1
+        url = urlsplit(request.url)
+        if url.path.endswith('/w/api.php'):
+            titles = parse_qs(url.query)['titles'][0].split('|')
+            pages = [self._revision(title) for title in titles]
+            body = json.dumps({'query': {'pages': pages}}).encode('utf-8')
+            return self._response(request, 200, body, 'application/json')
+        text = self.pages.get(unquote(url.path.rsplit('/', 1)[-1]))
+        if text is None:
+            return self._response(request, 404, b'', 'text/plain')
+        return self._response(request, 200, text.encode('utf-8'), 'text/x-wiki; charset=UTF-8')
+
+    def _revision(self, title):
+        if title not in self.pages:
+            return {'title': title, 'missing': True}
+        return {'title': title, 'revisions': [{'revid': 1, 'slots': {'main': {'content': self.pages[title]}}}]}
+
+    def _response(self, request, status, body, content_type):
+        response = Response()
+        response.status_code = status
+        response.headers['Content-Type'] = content_type
+        response._content = body
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def load_corpus():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(CORPUS, '*.txt'))):
+        with open(path, encoding='utf-8') as f:
+            pages[os.path.splitext(os.path.basename(path))[0]] = f.read()
+    return pages
+
+
+def build_stages(pages):
+    # name -> (function running the stage once over the corpus, pages per run)
+    titles = list(pages)
+    parser = YAWiktionaryParser(base_url='http://corpus.invalid', transport=CorpusTransport(pages))
+    terms = [Entry(text, title).term(serbocroatian.LANG_NAME) for title, text in pages.items()]
+    definitions = [d for term in terms for d in serbocroatian.parse_term(term)]
+    records = [serialize.encode(d) for d in definitions]
+
+    def lookup():
+        serbocroatian.invalidate()
+        for title in titles:
+            serbocroatian.get(title, parser)
+
+    return {
+        'fetch': (lambda: [parser.get_raw(title) for title in titles], len(titles)),
+        'fetch_batch': (lambda: parser.get_raw_batch(titles), len(titles)),
+        'sections': (lambda: [Entry(text, title) for title, text in pages.items()], len(titles)),
+        'sections_lazy': (lambda: [Entry(text, title, lazy=True).term(serbocroatian.LANG_NAME).headings
+                                   for title, text in pages.items()], len(titles)),
+        'definitions': (lambda: [serbocroatian.parse_term(term) for term in terms], len(titles)),
+        'to_json': (lambda: [d.toJSON() for d in definitions], len(titles)),
+        'encode': (lambda: [serialize.encode(d) for d in definitions], len(titles)),
+        'decode': (lambda: [serialize.decode(r, serbocroatian.Definition) for r in records], len(titles)),
+        'lookup': (lookup, len(titles)),
+    }
+
+
+def measure(run, pages, number, repeat):
+    seconds = min(timeit.repeat(run, number=number, repeat=repeat)) / number
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'latency_us': seconds / pages * 1e6,
+        'pages_per_sec': pages / seconds,
+        'peak_kib': peak / 1024,
+    }
+
+
+def compare(results, baseline, tolerance):
+    # Prints every stage next to its baseline; returns the stages that got slower
+    regressions = []
+    print('{0:14s} {1:>12s} {2:>12s} {3:>10s} {4:>12s} {5:>8s}'.format(
+        'stage', 'us/page', 'pages/s', 'peak KiB', 'baseline us', 'ratio'))
+    for name, result in results.items():
+        base = baseline.get(name)
+        line = '{0:14s} {1:12.1f} {2:12.0f} {3:10.1f}'.format(
+            name, result['latency_us'], result['pages_per_sec'], result['peak_kib'])
+        if base:
+            ratio = result['latency_us'] / base['latency_us']
+            line += ' {0:12.1f} {1:7.2f}x'.format(base['latency_us'], ratio)
+            if ratio > 1 + tolerance:
+                line += '  REGRESSION'
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--stage', action='append', help='run only this stage (repeatable)')
+    parser.add_argument('--number', type=int, default=200, help='runs over the corpus per timing')
+    parser.add_argument('--repeat', type=int, default=5, help='timings per stage; the fastest is kept')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown before a stage is flagged')
+    parser.add_argument('--save', action='store_true', help='store these results as the new baseline')
+    args = parser.parse_args()
+
+    stages = build_stages(load_corpus())
+    names = args.stage or list(stages)
+    unknown = [name for name in names if name not in stages]
+    if unknown:
+        parser.error('unknown stage {0}; choose from {1}'.format(', '.join(unknown), ', '.join(stages)))
+
+    results = {}
+    for name in names:
+        run, pages = stages[name]
+        results[name] = measure(run, pages, args.number, args.repeat)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['stages']
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save:
+        stored = dict(baseline)
+        for name, result in results.items():
+            stored[name] = {key: round(value, 2) for key, value in result.items()}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'stages': stored},
+                      f, indent=2, sort_keys=True)
+            f.write('\n')
+    elif regressions:
+        raise SystemExit('slower than baseline: {0}'.format(', '.join(regressions)))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,10 +4,6 @@
 # e = p.get('pivo')
 # print(e)
 import sys
-from yawp.dict import serbocroatian
+from yawp.cli import main
 
-definitions = serbocroatian.get(sys.argv[1])
-for d in definitions:
-    print(d.word)
-    print(d)
-    print(d.inflection)
\ No newline at end of file
+sys.exit(main())
@@ -0,0 +1,4 @@
+import sys
+from yawp.cli import main
+
+sys.exit(main())
@@ -0,0 +1,203 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+CachedPage = namedtuple('CachedPage', ['text', 'etag', 'last_modified', 'fetched', 'fresh', 'revision'])
+
+
+class RawCache:
+
+    ITEMS_PAGE = 500
+
+    def __init__(self, path=':memory:', ttl=7 * 24 * 3600, max_entries=100000, access_interval=60):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Access times only order evictions, so a hit rewrites one only when it
+        # is older than this many seconds; most hits are then plain reads
+        self.access_interval = access_interval
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Imported here so MemoryCache users don't load sqlite3
+        import sqlite3
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # A write-ahead log makes the writes that remain cheap commits instead of
+        # rewriting the journal, and lets other processes read meanwhile
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.execute('PRAGMA synchronous = NORMAL')
+        with self._conn:
+            self._conn.execute('''CREATE TABLE IF NOT EXISTS pages (
+                site TEXT NOT NULL,
+                term TEXT NOT NULL,
+                text TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched REAL NOT NULL,
+                accessed REAL NOT NULL,
+                revision INTEGER,
+                PRIMARY KEY (site, term))''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed)')
+            columns = [row[1] for row in self._conn.execute('PRAGMA table_info(pages)')]
+            if 'revision' not in columns:
+                self._conn.execute('ALTER TABLE pages ADD COLUMN revision INTEGER')
+        self._count = self._conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    def __len__(self):
+        return self._count
+
+    def get(self, site, term):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT text, etag, last_modified, fetched, revision, accessed FROM pages WHERE site = ? AND term = ?',
+                (site, term)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if now - row[5] >= self.access_interval:
+                with self._conn:
+                    self._conn.execute('UPDATE pages SET accessed = ? WHERE site = ? AND term = ?', (now, site, term))
+            fresh = self.ttl is None or now - row[3] < self.ttl
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale += 1
+            return CachedPage(row[0], row[1], row[2], row[3], fresh, row[4])
+
+    def revision(self, site, term):
+        # Revision id stored with the page, without counting as a hit or access
+        with self._lock:
+            row = self._conn.execute('SELECT revision FROM pages WHERE site = ? AND term = ?', (site, term)).fetchone()
+        return row[0] if row else None
+
+    def exists(self, site, term):
+        # Whether the page is stored at all; pages fetched through get_raw() have no revision id
+        with self._lock:
+            row = self._conn.execute('SELECT 1 FROM pages WHERE site = ? AND term = ?', (site, term)).fetchone()
+        return row is not None
+
+    def put(self, site, term, text, etag=None, last_modified=None, revision=None):
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'UPDATE pages SET text = ?, etag = ?, last_modified = ?, fetched = ?, accessed = ?, revision = ? WHERE site = ? AND term = ?',
+                (text, etag, last_modified, now, now, revision, site, term))
+            if cursor.rowcount == 0:
+                self._conn.execute(
+                    'INSERT INTO pages (site, term, text, etag, last_modified, fetched, accessed, revision) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (site, term, text, etag, last_modified, now, now, revision))
+                self._count += 1
+                self._evict()
+
+    def touch(self, site, term):
+        # Called after a 304 Not Modified: the stored copy is good for another ttl
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE pages SET fetched = ?, accessed = ? WHERE site = ? AND term = ?',
+                               (now, now, site, term))
+            self.revalidated += 1
+
+    def delete(self, site, term):
+        with self._lock, self._conn:
+            cursor = self._conn.execute('DELETE FROM pages WHERE site = ? AND term = ?', (site, term))
+            self._count -= cursor.rowcount
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM pages')
+            self._count = 0
+
+    def _evict(self):
+        if self.max_entries is None or self._count <= self.max_entries:
+            return
+        excess = self._count - self.max_entries
+        cursor = self._conn.execute(
+            'DELETE FROM pages WHERE rowid IN (SELECT rowid FROM pages ORDER BY accessed LIMIT ?)', (excess,))
+        self._count -= cursor.rowcount
+        self.evictions += cursor.rowcount
+
+    def items(self, site):
+        # Yields (term, text) for every cached page of a site without touching access
+        # times. Pages are read ITEMS_PAGE at a time, continuing after the last term
+        # seen, so only one page of wikitext is held and the lock is never held
+        # while the caller works.
+        last, after = '', '>='
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT term, text FROM pages WHERE site = ? AND term {0} ? ORDER BY term LIMIT ?'.format(after),
+                    (site, last, self.ITEMS_PAGE)).fetchall()
+            yield from rows
+            if len(rows) < self.ITEMS_PAGE:
+                return
+            last, after = rows[-1][0], '>'
+
+    def stats(self):
+        return {
+            'entries': self._count,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'revalidated': self.revalidated,
+            'evictions': self.evictions,
+        }
+
+    def close(self):
+        self._conn.close()
+
+
+class MemoryCache:
+    # Bounded, thread-safe LRU for parsed results kept in process memory
+
+    MISSING = object()
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            try:
+                value = self._items[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while self.maxsize is not None and len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, predicate=None):
+        # Drops every key for which predicate(key) is true, or everything
+        with self._lock:
+            if predicate is None:
+                self._items.clear()
+                return
+            for key in [key for key in self._items if predicate(key)]:
+                del self._items[key]
+
+    def stats(self):
+        return {
+            'entries': len(self._items),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,113 @@
+import argparse
+import sys
+import time
+from yawp.dict import serbocroatian
+from yawp.parser import YAWiktionaryParser
+
+
+def lookup(argv):
+    parser = argparse.ArgumentParser(prog='yawp', description='Look up a Serbo-Croatian word on Wiktionary')
+    parser.add_argument('word')
+    parser.add_argument('--lexicon', help='answer from a lexicon snapshot instead of the network')
+    args = parser.parse_args(argv)
+
+    if args.lexicon:
+        serbocroatian.load_lexicon(args.lexicon)
+    definitions = serbocroatian.get(args.word)
+    for d in definitions or []:
+        print(d.word)
+        print(d)
+        print(d.inflection)
+
+
+def build_lexicon(argv):
+    parser = argparse.ArgumentParser(prog='yawp build-lexicon',
+                                     description='Build a Serbo-Croatian lexicon snapshot from a pages-articles dump')
+    parser.add_argument('dump', help='enwiktionary-*-pages-articles.xml[.bz2]')
+    parser.add_argument('output', help='snapshot file to write')
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    count = serbocroatian.build_lexicon(args.dump, args.output, args.workers)
+    print('{0} entries written to {1} in {2:.1f}s'.format(count, args.output, time.time() - start))
+
+
+def batch(argv):
+    parser = argparse.ArgumentParser(prog='yawp batch',
+                                     description='Look up a list of words, one per line, and write JSON Lines')
+    parser.add_argument('words', nargs='?', default='-', help='file with one word per line (default: stdin)')
+    parser.add_argument('-o', '--output', default='-', help='file to write (default: stdout)')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--order', choices=['input', 'completion'], default='input',
+                        help='write results in input order or as soon as they are ready')
+    parser.add_argument('--batch-size', type=int, default=serbocroatian.BATCH_SIZE, help='words per api.php request')
+    parser.add_argument('--lexicon', help='answer from a lexicon snapshot instead of the network')
+    parser.add_argument('--quiet', action='store_true', help='no progress or summary on stderr')
+    args = parser.parse_args(argv)
+
+    # Without a lexicon every worker holds an HTTP connection, so the pool has
+    # to be as large as the thread count to keep them all alive
+    if args.lexicon:
+        serbocroatian.load_lexicon(args.lexicon)
+        http = None
+    else:
+        http = YAWiktionaryParser(pool_size=args.workers)
+    source = sys.stdin if args.words == '-' else open(args.words, encoding='utf-8')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    words = (line.strip() for line in source if line.strip())
+    import json
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    start = time.time()
+    last_report = start
+    counts = {'found': 0, 'missing': 0, 'failed': 0}
+    failures = []
+    try:
+        for word, definitions, error in serbocroatian.iter_many(words, args.workers, args.order == 'input', http, args.batch_size):
+            if error is not None:
+                counts['failed'] += 1
+                failures.append((word, error))
+                record = {'word': word, 'error': '{0}: {1}'.format(type(error).__name__, error)}
+            else:
+                counts['found' if definitions else 'missing'] += 1
+                record = {'word': word, 'definitions': [d.to_dict() for d in definitions] if definitions else None}
+            output.write(encoder.encode(record))
+            output.write('\n')
+            now = time.time()
+            if not args.quiet and now - last_report >= 1:
+                output.flush()
+                last_report = now
+                done = sum(counts.values())
+                sys.stderr.write('\r{0} words, {1:.0f}/s, {2} failed'.format(done, done / (now - start), counts['failed']))
+                sys.stderr.flush()
+    finally:
+        output.flush()
+        if output is not sys.stdout:
+            output.close()
+        if source is not sys.stdin:
+            source.close()
+        if http is not None:
+            http.close()
+
+    if not args.quiet:
+        elapsed = time.time() - start
+        done = sum(counts.values())
+        sys.stderr.write('\r{0} words in {1:.1f}s ({2:.0f}/s): {3} found, {4} without an entry, {5} failed\n'.format(
+            done, elapsed, done / elapsed if elapsed else 0, counts['found'], counts['missing'], counts['failed']))
+        for word, error in failures:
+            sys.stderr.write('  {0}: {1}: {2}\n'.format(word, type(error).__name__, error))
+    return 1 if failures else 0
+
+
+COMMANDS = {
+    'batch': batch,
+    'build-lexicon': build_lexicon,
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+    return lookup(argv)
@@ -0,0 +1,71 @@
+import importlib
+import time
+from yawp.dict import base
+from yawp.parser import shared_parser
+
+# Section title -> language plugin. A plugin is a module (or any object) with
+# LANG_NAME and parse_term(term, stats=None) returning yawp.dict.base.Definition
+# instances. Entries given as module names are imported the first time their
+# language turns up on a page.
+PLUGINS = {
+    'Serbo-Croatian': 'yawp.dict.serbocroatian',
+}
+
+
+def register(plugin, language=None):
+    # plugin is one of
+    #  - an object with LANG_NAME and parse_term(); language defaults to its LANG_NAME
+    #  - a module name, imported on first use; language is then required
+    #  - a base.Definition subclass, parsed with base.parse_term(); language is required
+    #  - a {language: plugin} dict of any of the above, registered one by one
+    if isinstance(plugin, dict):
+        for name, each in plugin.items():
+            register(each, name)
+        return plugin
+    if isinstance(plugin, str) or isinstance(plugin, type):
+        if language is None:
+            raise ValueError('register({0!r}) needs the language it is for'.format(plugin))
+        if isinstance(plugin, type):
+            plugin = base.Plugin(language, plugin)
+    PLUGINS[language or plugin.LANG_NAME] = plugin
+    return plugin
+
+
+# Parts of speech and meanings only; their inflection tables are not parsed yet
+register({'Slovene': base.Definition, 'Russian': base.Definition, 'Polish': base.Definition})
+
+
+def plugin(language):
+    found = PLUGINS[language]
+    if isinstance(found, str):
+        found = PLUGINS[language] = importlib.import_module(found)
+    return found
+
+
+def get(word, languages=None, parser=None):
+    # One fetch of word's page; returns {language: [definitions]} for every
+    # section with a registered plugin (only `languages` when given)
+    p = parser or shared_parser()
+    entry = p.get(word, lazy=True)
+    if entry is None:
+        return {}
+    return parse_entry(entry, languages, p.stats)
+
+
+def parse_entry(entry, languages=None, stats=None):
+    # The page was split into language sections once when entry was built; each
+    # wanted section is scanned for its headings once and handed to its plugin
+    definitions = {}
+    for language in entry.languages:
+        if language not in PLUGINS or (languages is not None and language not in languages):
+            continue
+        term = entry.term(language)
+        if stats is None:
+            definitions[language] = plugin(language).parse_term(term)
+            continue
+        start = time.perf_counter()
+        found = plugin(language).parse_term(term, stats)
+        stats.observe('definitions', time.perf_counter() - start)
+        stats.add('definitions_built', len(found))
+        definitions[language] = found
+    return definitions
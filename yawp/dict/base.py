@@ -0,0 +1,100 @@
+import functools
+from yawp import wikitext
+from yawp.paradigm import NO_PARADIGM, Inflection
+
+PARTS_OF_SPEECH = ['Verb', 'Noun', 'Adjective', 'Adverb', 'Preposition', 'Interjection', 'Pronoun', 'Conjunction',
+                   'Letter', 'Particle', 'Proper Noun', 'Numeral', 'Determiner', 'Postposition', 'Prefix', 'Suffix',
+                   'Phrase', 'Proverb']
+INFLECTIONS = ['Conjugation', 'Declension', 'Inflection']
+
+
+@functools.lru_cache(maxsize=None)
+def _json_encoder():
+    # json is only imported once something is serialized
+    import json
+    return json.JSONEncoder(sort_keys=True, separators=(',', ':'))
+
+
+def parse_term(term, cls, stats=None):
+    # Groups a language section's headings into one cls per part of speech,
+    # each followed by the inflection headings that belong to it
+    definitions = []
+    headings = []
+
+    for heading in term.headings:
+        if heading.title in cls.PARTS_OF_SPEECH:
+            if len(headings) > 0:
+                definitions.append(cls(term.word, headings, stats))
+                headings = []
+            headings.append(heading)
+        elif heading.title in cls.INFLECTIONS:
+            headings.append(heading)
+        #TODO: I would like to grab Derived terms and Related terms later as well.
+
+    if len(headings) > 0:
+        definitions.append(cls(term.word, headings, stats))
+
+    return definitions
+
+
+class Definition:
+    # What every language plugin hands back. A plugin with no inflection
+    # parsing can use this as is; others subclass it, narrow PARTS_OF_SPEECH /
+    # INFLECTIONS and override paradigm() and parse_inflection().
+    __slots__ = ('word', 'part_of_speech', 'meanings', 'inflection')
+
+    PARTS_OF_SPEECH = PARTS_OF_SPEECH
+    INFLECTIONS = INFLECTIONS
+
+    def __init__(self, word, headings, stats=None):
+        self.word = word
+        self.part_of_speech = ''
+        self.meanings = []
+        self.inflection = Inflection(NO_PARADIGM)
+
+        for heading in headings:
+            self.parse_heading(heading, stats)
+
+    def parse_heading(self, heading, stats=None):
+        if heading.title in self.PARTS_OF_SPEECH:
+            self.part_of_speech = heading.title
+            # Cleaned once here into wikitext.Meaning tuples (gloss, labels, examples)
+            self.meanings.extend(wikitext.parse_meanings(heading.text))
+
+        elif heading.title in self.INFLECTIONS:
+            if not self.inflection:
+                self.inflection = Inflection(self.paradigm(heading.title))
+            self.inflection['type'] = heading.title
+            self.parse_inflection(heading, stats)
+
+    def paradigm(self, inflection_type):
+        return NO_PARADIGM
+
+    def parse_inflection(self, heading, stats=None):
+        pass
+
+    def to_dict(self):
+        return {
+            'word': self.word,
+            'part_of_speech': self.part_of_speech,
+            'meanings': [wikitext.meaning_to_dict(meaning) for meaning in self.meanings],
+            'inflection': dict(self.inflection),
+        }
+
+    def toJSON(self):
+        return _json_encoder().encode(self.to_dict())
+
+    def __str__(self):
+        return "{0}: {1}".format(self.part_of_speech, [meaning.gloss for meaning in self.meanings])
+
+
+class Plugin:
+    # A language plugin built from a Definition class alone, for languages whose
+    # sections need no parsing beyond what Definition does itself
+
+    def __init__(self, language, cls=Definition):
+        self.LANG_NAME = language
+        self.cls = cls
+
+    def parse_term(self, term, stats=None):
+        return parse_term(term, self.cls, stats)
@@ -1,261 +1,578 @@
-import json
+import functools
+import os
 import re
-from yawp.parser import YAWiktionaryParser
+import threading
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from yawp import dump
+from yawp.dict import base
+from yawp.cache import MemoryCache
+from yawp.index import FormIndex
+from yawp.lexicon import Lexicon, LexiconWriter
+from yawp import serialize
+from yawp.lazy import LazyRegex
+from yawp.paradigm import NO_PARADIGM, Paradigm
+from yawp.parser import BATCH_SIZE, DEFAULT_POOL_SIZE, Entry, RateLimiter, YAWiktionaryParser, shared_parser
+from yawp.search import SearchIndex
 
 LANG_NAME = 'Serbo-Croatian'
 PARTS_OF_SPEECH = ['Verb', 'Noun', 'Adjective', 'Adverb', 'Preposition', 'Interjection', 'Pronoun', 'Conjunction', 'Letter', 'Particle', 'Proper Noun']
 INFLECTIONS = ['Conjugation', 'Declension']
 NOUN_CASES = ['Nominative', 'Genitive', 'Dative', 'Accusative', 'Vocative', 'Locative', 'Instrumental']
 
-_conjugation_regex = re.compile(r"^\|(?P<form>\w+\.\w+)=(?P<inflected_word>.*)$", re.RegexFlag.MULTILINE)
-_noun_declension_regex = re.compile(r"\|(?P<inflected_word1>.*?)\|(?P<inflected_word2>.*)$", re.RegexFlag.MULTILINE)
-_adj_full_declension_regex = re.compile(r"sh-adj-full\|(?P<root1>\w+)\|\w+\|(?P<root2>\w+)\|\w+", re.RegexFlag.MULTILINE)
-_adj_def_declension_regex = re.compile(r"sh-adj-def\|(?P<root>\w+)\|\w+", re.RegexFlag.MULTILINE)
-_adj_defindef_declension_regex = re.compile(r"sh-adj-defindef\|(?P<root>\w+)\|\w+", re.RegexFlag.MULTILINE)
+_conjugation_regex = LazyRegex(r"^\|(?P<form>\w+\.\w+)=(?P<inflected_word>.*)$", re.RegexFlag.MULTILINE)
+_noun_declension_regex = LazyRegex(r"\|(?P<inflected_word1>.*?)\|(?P<inflected_word2>.*)$", re.RegexFlag.MULTILINE)
+_adj_template_regex = LazyRegex(r"(?P<template>sh-adj-[\w-]+)\|(?P<args>[^{}\n]*)")
+_word_regex = LazyRegex(r"^\w+$")
 #TODO: PJC There are other declension templates, see https://en.wiktionary.org/wiki/Category:Serbo-Croatian_declension-table_templates
 
-def get(word):
-    p = YAWiktionaryParser()
-    entry = p.get(word)
-    if entry:
-        for term in entry.terms:
-            if term.language == LANG_NAME:
-                return parse_term(term)
-    return None
+
+# Paradigm tables. A new sh-conj parameter or sh-adj-* template (ADJ_TEMPLATES)
+# should only need a new row, not new parsing code.
+
+PERSONS = ['First', 'Second', 'Third']
+NUMBERS = ['singular', 'plural']
+GENDERS = ['masculine', 'feminine', 'neuter']
+
+# sh-conj parameters that map straight onto one label
+_SIMPLE_FORMS = {
+    'p.va': 'Past verbal adverb',
+    'pr.va': 'Present verbal adverb',
+    'vn': 'Verbal noun',
+    'ppp.ms': 'Passive past participle masculine singular',
+    'ppp.fs': 'Passive past participle feminine singular',
+    'ppp.ns': 'Passive past participle neuter singular',
+    'ppp.mp': 'Passive past participle masculine plural',
+    'ppp.fp': 'Passive past participle feminine plural',
+    'ppp.np': 'Passive past participle neuter plural',
+}
+
+# Personal forms: parameter prefix -> (tense label, persons/numbers present in the template)
+_PERSONAL_FORMS = {
+    'pr': ('present', ['1s', '2s', '3s', '1p', '2p', '3p']),
+    'impf': ('past imperfect', ['1s', '2s', '3s', '1p', '2p', '3p']),
+    'a': ('past aorist', ['1s', '2s', '3s', '1p', '2p', '3p']),
+    'impt': ('imperative', ['2s', '1p', '2p']),
+}
+
+# Future I is built from the infinitive (f1.hr) or the stem (f1.stem) plus the clitic of ht(j)eti
+_FUTURE_CLITICS = {
+    'singular': ['ću', 'ćeš', 'će'],
+    'plural': ['ćemo', 'ćete', 'će'],
+}
+
+# Compound tenses built on the active past participle: (tense, auxiliary prefixes or
+# suffixes by number, whether the auxiliary goes before the participle)
+_PARTICIPLE_TENSES = [
+    ('future II', {'singular': ['budem', 'budeš', 'bude'], 'plural': ['budemo', 'budete', 'budu']}, True),
+    ('past perfect', {'singular': ['sam', 'si', 'je'], 'plural': ['smo', 'ste', 'su']}, False),
+    ('past pluperfect', {'singular': ['{0} sam', '{0} si', '{0} je'], 'plural': ['{0} smo', '{0} ste', '{0} su']}, True),
+    ('conditional I', {'singular': ['bih', 'bi', 'bi'], 'plural': ['bismo', 'biste', 'bi']}, False),
+    ('conditional II', {'singular': ['{0} bih', '{0} bi', '{0} bi'], 'plural': ['{0} bismo', '{0} biste', '{0} bi']}, True),
+]
+# Active past participle of biti, used by the pluperfect and conditional II
+_BITI_PARTICIPLE = {
+    ('masculine', 'singular'): 'bio', ('feminine', 'singular'): 'bila', ('neuter', 'singular'): 'bilo',
+    ('masculine', 'plural'): 'bili', ('feminine', 'plural'): 'bile', ('neuter', 'plural'): 'bila',
+}
+
+
+def _conjugation_forms():
+    # sh-conj parameter -> ((label, prefix, suffix), ...) applied to the parameter's value
+    forms = {form: ((label, '', ''),) for form, label in _SIMPLE_FORMS.items()}
+    for code, (tense, slots) in _PERSONAL_FORMS.items():
+        for slot in slots:
+            label = '{0} person {1} {2}'.format(PERSONS[int(slot[0]) - 1], NUMBERS[slot[1] == 'p'], tense)
+            forms['{0}.{1}'.format(code, slot)] = ((label, '', ''),)
+    for code, label_suffix, separator in [('f1.hr', ' future I (Croatian)', ' '), ('f1.stem', ' future I', '')]:
+        forms[code] = tuple(
+            ('{0} person {1}{2}'.format(PERSONS[p], number, label_suffix), '', separator + clitic)
+            for number in NUMBERS for p, clitic in enumerate(_FUTURE_CLITICS[number]))
+    for gender in GENDERS:
+        for number in NUMBERS:
+            labels = [('Active past participle {0} {1}'.format(gender, number), '', '')]
+            for tense, auxiliaries, before in _PARTICIPLE_TENSES:
+                for p, auxiliary in enumerate(auxiliaries[number]):
+                    auxiliary = auxiliary.format(_BITI_PARTICIPLE[(gender, number)])
+                    label = '{0} person {1} {2} {3}'.format(PERSONS[p], gender, number, tense)
+                    labels.append((label, auxiliary + ' ', '') if before else (label, '', ' ' + auxiliary))
+            forms['app.{0}{1}'.format(gender[0], number[0])] = tuple(labels)
+    return forms
+
+CONJUGATION_FORMS = _conjugation_forms()
+_CONJUGATION_LABELS = {form: tuple(label for label, _, _ in labels) for form, labels in CONJUGATION_FORMS.items()}
+
+# Adjective endings per case as (singular m, f, n), (plural m, f, n). None stands for
+# the lemma itself. The accusative masculine singular splits into inanimate/animate.
+_ADJ_INDEFINITE_ENDINGS = {
+    'nominative': ((None, 'a', 'o'), ('i', 'e', 'a')),
+    'genitive': (('a', 'e', 'a'), ('ih', 'ih', 'ih')),
+    'dative': (('u', 'oj', 'u'), ('im(a)', 'im(a)', 'im(a)')),
+    'accusative': (((None, 'a'), 'u', 'o'), ('e', 'e', 'a')),
+    'vocative': ((None, 'a', 'o'), ('i', 'e', 'a')),
+    'locative': (('u', 'oj', 'u'), ('im(a)', 'im(a)', 'im(a)')),
+    'instrumental': (('im', 'om', 'im'), ('im(a)', 'im(a)', 'im(a)')),
+}
+_ADJ_DEFINITE_ENDINGS = {
+    'nominative': (('i', 'a', 'o'), ('i', 'e', 'a')),
+    'genitive': (('og(a)', 'e', 'og(a)'), ('ih', 'ih', 'ih')),
+    'dative': (('om(u)', 'oj', 'om(u)'), ('im(a)', 'im(a)', 'im(a)')),
+    'accusative': ((('i', 'og(a)'), 'u', 'o'), ('e', 'e', 'a')),
+    'vocative': (('i', 'a', 'o'), ('i', 'e', 'a')),
+    'locative': (('om(u)', 'oj', 'om(u)'), ('im(a)', 'im(a)', 'im(a)')),
+    'instrumental': (('im', 'om', 'im'), ('im(a)', 'im(a)', 'im(a)')),
+}
+
+
+def _adj_declension(degree, endings):
+    # -> ((label, ...), (ending, ...)) with singular slots first, then plural
+    table = []
+    for n, number in enumerate(NUMBERS):
+        for case, forms in endings.items():
+            animate = None
+            for gender, ending in zip(GENDERS, forms[n]):
+                if isinstance(ending, tuple):
+                    ending, animate = ending
+                    table.append(('{0} {1} {2} inanimate {3}'.format(degree, case, gender, number), ending))
+                else:
+                    table.append(('{0} {1} {2} {3}'.format(degree, case, gender, number), ending))
+            if animate is not None:
+                table.append(('{0} {1} masculine animate {2}'.format(degree, case, number), animate))
+    return tuple(label for label, _ in table), tuple(ending for _, ending in table)
+
+ADJ_INDEFINITE = _adj_declension('Indefinite', _ADJ_INDEFINITE_ENDINGS)
+ADJ_DEFINITE = _adj_declension('Definite', _ADJ_DEFINITE_ENDINGS)
+ADJ_COMPARATIVE = _adj_declension('Comparative', _ADJ_DEFINITE_ENDINGS)
+
+# sh-adj-* declension template -> (positional parameters it takes, the degree
+# tables it fills with the index of the parameter holding each one's root).
+# sh-adj-full|dobr|dȍbar|bolj|bȍljī: indefinite and definite from dobr, comparative from bolj
+ADJ_TEMPLATES = {
+    'sh-adj-full': (4, [(ADJ_INDEFINITE, 0), (ADJ_DEFINITE, 0), (ADJ_COMPARATIVE, 2)]),
+    'sh-adj-def': (2, [(ADJ_DEFINITE, 0)]),
+    'sh-adj-defindef': (2, [(ADJ_INDEFINITE, 0), (ADJ_DEFINITE, 0)]),
+}
+
+# Shared label schemas for Definition.inflection, one per kind of inflection table
+VERB = Paradigm('sh-verb', ('type', 'Infinitive'), *_CONJUGATION_LABELS.values())
+NOUN = Paradigm('sh-noun', ('type',), tuple(case + ' ' + number for case in NOUN_CASES for number in NUMBERS))
+ADJECTIVE = Paradigm('sh-adjective', ('type',), ADJ_INDEFINITE[0], ADJ_DEFINITE[0], ADJ_COMPARATIVE[0])
+
+# Serbian Cyrillic -> Gaj's Latin alphabet
+_CYRILLIC = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'ђ': 'đ', 'е': 'e', 'ж': 'ž', 'з': 'z', 'и': 'i',
+    'ј': 'j', 'к': 'k', 'л': 'l', 'љ': 'lj', 'м': 'm', 'н': 'n', 'њ': 'nj', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'ћ': 'ć', 'у': 'u', 'ф': 'f', 'х': 'h', 'ц': 'c', 'ч': 'č', 'џ': 'dž', 'ш': 'š',
+}
+_TO_LATIN = str.maketrans(dict(_CYRILLIC, **{c.upper(): l.capitalize() for c, l in _CYRILLIC.items()}))
+_combining_regex = LazyRegex('[\u0300-\u036f]')
+
+def to_latin(text):
+    # Decompose first so accented Cyrillic vowels (ѐ, о̀) transliterate too
+    return unicodedata.normalize('NFC', unicodedata.normalize('NFD', text).translate(_TO_LATIN))
+
+def normalize(text):
+    # Lookup key that ignores case, script, tone marks and č/ć/š/ž/đ:
+    # 'Вòда', 'vòda' and 'VODA' all become 'voda', 'čašu' becomes 'casu', 'đak' becomes 'djak'
+    text = unicodedata.normalize('NFD', to_latin(text.lower()))
+    return _combining_regex.sub('', text).replace('đ', 'dj')
+
+# Set by load_lexicon(); get() then answers from the snapshot instead of the network
+_lexicon = None
+
+# Bump whenever a parsing change alters the Definitions produced for a page, so
+# memoized results from an older parser are never handed out.
+PARSER_VERSION = 2
+
+# Definitions from live lookups, keyed by (site, word, PARSER_VERSION). Cached
+# lists are shared between callers, so copy one before changing it.
+memo = MemoryCache(maxsize=10000)
+
+def get(word, parser=None):
+    # Read the global once: load_lexicon() may swap it from another thread
+    lexicon = _lexicon
+    if parser is None and lexicon is not None:
+        return lexicon.get(word)
+    p = parser or shared_parser()
+    key = (p.site, word, PARSER_VERSION)
+    definitions = memo.get(key)
+    if definitions is MemoryCache.MISSING:
+        definitions = _parse_entry(p.get(word, lazy=True), p.stats)
+        memo.put(key, definitions)
+    elif p.stats is not None:
+        p.stats.add('memo_hits')
+    return definitions
+
+def invalidate(word=None, site=None):
+    # Forgets memoized definitions for word on site; None matches every word or site
+    if word is None and site is None:
+        memo.invalidate()
+    else:
+        memo.invalidate(lambda key: (word is None or key[1] == word) and (site is None or key[0] == site))
+
+def load_lexicon(path):
+    # Serve get() from a snapshot written by build_lexicon(). A word missing from
+    # the snapshot has no Serbo-Croatian entry, so get() returns None for it
+    # without going to the network. load_lexicon(None) switches back to live lookups.
+    # The old snapshot is not closed, since other threads may still be reading
+    # it; its mmap is released once the last reference to it is dropped.
+    global _lexicon
+    lexicon = Lexicon(path, Definition) if path else None
+    _lexicon = lexicon
+    return lexicon
+
+def build_lexicon(source, path, workers=1, batch_size=200):
+    # Parses a pages-articles dump into a lexicon snapshot at path
+    with LexiconWriter(path) as writer:
+        if workers == 1:
+            pages = (page for batch in dump.iter_batches(_iter_sections(source), batch_size) for page in _pack_pages(batch))
+        else:
+            pages = dump.map_batches(_pack_pages, _iter_sections(source), workers, batch_size)
+        for title, revision, data in pages:
+            writer.add_packed(title, data, revision)
+    return len(writer)
+
+def get_many(words, concurrency=8, parser=None, rate_limit=None, batch=True):
+    # Looks up every distinct word on a thread pool sharing one parser and so one
+    # connection pool.
+    # With batch=True up to BATCH_SIZE words go out in each api.php request.
+    # A parser passed in is used as is, with its own pool size and rate limit;
+    # otherwise one sized for `concurrency` and limited to `rate_limit` is used.
+    # Returns (definitions, errors), both dicts keyed by word.
+    p = parser or _batch_parser(concurrency, rate_limit)
+    chunks = _chunks(words, BATCH_SIZE if batch else 1)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(_get_chunk, chunk, p, batch) for chunk in chunks]
+        return _collect(chunks, [_result(f) for f in futures])
+
+async def get_many_async(words, concurrency=8, parser=None, rate_limit=None, batch=True):
+    # asyncio flavour of get_many: at most `concurrency` requests run at once, each
+    # on a worker thread using the parser's pooled session.
+    p = parser or _batch_parser(concurrency, rate_limit)
+    chunks = _chunks(words, BATCH_SIZE if batch else 1)
+    import asyncio
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def lookup(chunk):
+            async with semaphore:
+                return await loop.run_in_executor(executor, _get_chunk, chunk, p, batch)
+        results = await asyncio.gather(*[lookup(chunk) for chunk in chunks], return_exceptions=True)
+    return _collect(chunks, results)
+
+def iter_many(words, workers=8, ordered=True, parser=None, batch_size=BATCH_SIZE):
+    # Streams (word, definitions, error) for every word of a possibly endless
+    # iterable. Chunks of batch_size words are looked up on `workers` threads and
+    # at most 2 * workers chunks are read ahead. With ordered=False a chunk is
+    # yielded as soon as it finishes instead of in input order.
+    lexicon = _lexicon
+    if parser is None and lexicon is not None:
+        lookup = functools.partial(_lexicon_chunk, lexicon)
+    else:
+        lookup = functools.partial(_get_chunk, parser=parser or shared_parser(), batch=True)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in dump.iter_batches(words, batch_size):
+            pending.append((chunk, executor.submit(lookup, chunk)))
+            if len(pending) >= workers * 2:
+                yield from _finished(pending, ordered)
+        while pending:
+            yield from _finished(pending, ordered)
+
+def _lexicon_chunk(lexicon, words):
+    return [lexicon.get(word) for word in words]
+
+def _finished(pending, ordered):
+    if ordered:
+        done = [pending.popleft()]
+    else:
+        finished, _ = wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+        done = [item for item in pending if item[1] in finished]
+        for item in done:
+            pending.remove(item)
+    for chunk, future in done:
+        result = _result(future)
+        for i, word in enumerate(chunk):
+            if isinstance(result, BaseException):
+                yield word, None, result
+            else:
+                yield word, result[i], None
+
+# Parsers for get_many() calls that need more connections than
+# shared_parser() has or a rate limit, keyed by (rate_limit, pool size). A
+# limit is owed to the host, not to one call, so every parser with the same
+# rate_limit shares one RateLimiter and concurrent batches stay under it together.
+_batch_parsers = {}
+_rate_limiters = {}
+_batch_parsers_lock = threading.Lock()
+
+def _batch_parser(concurrency, rate_limit):
+    pool_size = max(concurrency, DEFAULT_POOL_SIZE)
+    if rate_limit is None and pool_size == DEFAULT_POOL_SIZE:
+        return shared_parser()
+    with _batch_parsers_lock:
+        parser = _batch_parsers.get((rate_limit, pool_size))
+        if parser is None:
+            parser = YAWiktionaryParser(pool_size=pool_size)
+            if rate_limit is not None:
+                parser.rate_limiter = _rate_limiters.setdefault(rate_limit, RateLimiter(rate_limit))
+            _batch_parsers[rate_limit, pool_size] = parser
+    return parser
+
+def _chunks(words, size):
+    unique = list(dict.fromkeys(words))
+    return [unique[i:i + size] for i in range(0, len(unique), size)]
+
+def _get_chunk(words, parser, batch):
+    if not batch:
+        return [get(word, parser) for word in words]
+    site = parser.site
+    definitions = {word: memo.get((site, word, PARSER_VERSION)) for word in words}
+    missing = [word for word in words if definitions[word] is MemoryCache.MISSING]
+    if parser.stats is not None and len(missing) < len(words):
+        parser.stats.add('memo_hits', len(words) - len(missing))
+    if missing:
+        entries = parser.get_batch(missing, lazy=True)
+        for word in missing:
+            definitions[word] = _parse_entry(entries[word], parser.stats)
+            memo.put((site, word, PARSER_VERSION), definitions[word])
+    return [definitions[word] for word in words]
+
+def _parse_entry(entry, stats=None):
+    # Only the Serbo-Croatian section gets its headings parsed when entry is lazy
+    term = entry.term(LANG_NAME) if entry else None
+    if not term:
+        return None
+    if stats is None:
+        return parse_term(term)
+    start = time.perf_counter()
+    definitions = parse_term(term, stats)
+    stats.observe('definitions', time.perf_counter() - start)
+    stats.add('definitions_built', len(definitions))
+    return definitions
+
+def _result(future):
+    try:
+        return future.result()
+    except Exception as e:
+        return e
+
+def _collect(chunks, results):
+    # A failed request is reported against every word it was fetching
+    definitions = {}
+    errors = {}
+    for words, result in zip(chunks, results):
+        for i, word in enumerate(words):
+            if isinstance(result, BaseException):
+                errors[word] = result
+            else:
+                definitions[word] = result[i]
+    return definitions, errors
+
+def refresh_lexicon(path, changes, parser=None):
+    # Re-parses only the changed pages listed in `changes` (see dump.iter_changes)
+    # whose revision differs from the one stored in the snapshot, and rewrites the
+    # snapshot with those entries replaced. Pages that lost their Serbo-Croatian
+    # section are dropped. Returns counts of what happened.
+    stats = {'updated': 0, 'removed': 0, 'unchanged': 0}
+    lexicon = Lexicon(path, Definition)
+    updates = {}
+    for title, revision, text in _iter_changed(changes, lexicon.revision, parser, stats):
+        section = dump.language_section(text, LANG_NAME) if text is not None else None
+        definitions = _parse_entry(Entry(section, title, lazy=True)) if section is not None else None
+        if definitions:
+            updates[title] = (revision, b''.join(serialize.pack_record(d) for d in definitions))
+            stats['updated'] += 1
+        elif title in lexicon:
+            updates[title] = None
+            stats['removed'] += 1
+
+    if updates:
+        with LexiconWriter(path) as writer:
+            for word, data, revision in lexicon.items():
+                if word not in updates:
+                    writer.add_packed(word, data, revision)
+            for word, update in updates.items():
+                if update is not None:
+                    writer.add_packed(word, update[1], update[0])
+    lexicon.close()
+    # Readers of the active snapshot keep it until they are done; load_lexicon()
+    # only swaps the new file in
+    active = _lexicon
+    if updates and active is not None and os.path.abspath(active.path) == os.path.abspath(path):
+        load_lexicon(path)
+    return stats
+
+def refresh_cache(cache, changes, parser=None, site='en'):
+    # Same as refresh_lexicon for a RawCache: stores new text for changed
+    # Serbo-Croatian pages (and pages already cached) with their revision ids.
+    stats = {'updated': 0, 'removed': 0, 'unchanged': 0}
+    stored = functools.partial(cache.revision, site)
+    for title, revision, text in _iter_changed(changes, stored, parser, stats):
+        cached = cache.exists(site, title)
+        if text is not None and (cached or dump.language_section(text, LANG_NAME) is not None):
+            cache.put(site, title, text, revision=revision)
+            invalidate(title, site)
+            stats['updated'] += 1
+        elif text is None and cached:
+            cache.delete(site, title)
+            invalidate(title, site)
+            stats['removed'] += 1
+    return stats
+
+def _iter_changed(changes, stored_revision, parser, stats):
+    # (title, revision, text) for changes whose revision is not the stored one.
+    # Titles that came without text are fetched BATCH_SIZE at a time through the
+    # query API; a page that no longer exists comes back with text None.
+    pending = []
+    for title, revision, text in dump.iter_changes(changes):
+        if revision is not None and stored_revision(title) == revision:
+            stats['unchanged'] += 1
+        elif text is not None:
+            yield title, revision, text
+        else:
+            pending.append(title)
+            if len(pending) == BATCH_SIZE:
+                parser = parser or shared_parser()
+                yield from _fetch_changed(pending, stored_revision, parser, stats)
+                pending = []
+    if pending:
+        parser = parser or shared_parser()
+        yield from _fetch_changed(pending, stored_revision, parser, stats)
+
+def _fetch_changed(titles, stored_revision, parser, stats):
+    revisions = parser.query_revisions(titles)
+    for title in titles:
+        page = revisions.get(title)
+        if page is None:
+            yield title, None, None
+        elif stored_revision(title) == page.revision:
+            stats['unchanged'] += 1
+        else:
+            yield title, page.revision, page.text
+
+def iter_dump(source):
+    # Yields (word, definitions) for every Serbo-Croatian entry in a pages-articles dump
+    for entry in dump.iter_entries(source, LANG_NAME):
+        term = entry.term(LANG_NAME)
+        if term:
+            yield entry.search_term, parse_term(term)
+
+def iter_dump_parallel(source, workers=None, batch_size=200, ordered=True, max_in_flight=None):
+    # Same as iter_dump but parses on a process pool. Yields (word, [definition json]).
+    pages = _iter_sections(source)
+    return dump.map_batches(_parse_pages, pages, workers, batch_size, ordered, max_in_flight)
+
+def _iter_sections(source):
+    # (title, revision, text) with pages cut down to their Serbo-Croatian section,
+    # so that is all that gets sent to a worker process
+    for page in dump.iter_pages(source):
+        section = dump.language_section(page.text, LANG_NAME)
+        if section is not None:
+            yield page.title, page.revision, section
+
+def _parse_pages(pages):
+    results = []
+    for title, _, text in pages:
+        term = Entry(text, title, lazy=True).term(LANG_NAME)
+        if term:
+            results.append((title, [d.toJSON() for d in parse_term(term)]))
+    return results
+
+def _pack_pages(pages):
+    results = []
+    for title, revision, text in pages:
+        term = Entry(text, title, lazy=True).term(LANG_NAME)
+        if term:
+            data = b''.join(serialize.pack_record(d) for d in parse_term(term))
+            results.append((title, revision, data))
+    return results
+
+def iter_cached(cache, site='en'):
+    # Yields (word, definitions) for every cached page that has a Serbo-Croatian section
+    for word, text in cache.items(site):
+        definitions = _parse_entry(Entry(text, word, lazy=True))
+        if definitions:
+            yield word, definitions
+
+def build_index(path, entries):
+    # entries: (word, definitions) pairs, e.g. from iter_dump() or iter_cached()
+    return FormIndex.build(path, entries, normalize)
+
+def load_index(path):
+    return FormIndex(path, normalize)
+
+def build_search(path, entries):
+    # Prefix and typo-tolerant search over the same forms as build_index()
+    return SearchIndex.build(path, entries, normalize)
+
+def load_search(path):
+    return SearchIndex(path, normalize)
 
 def get_json(word):
     defs = get(word)
     if defs:
-        json_defs = "["
-        for d in defs:
-            json_defs += d.toJSON() + ","
-        json_defs = json_defs.rstrip(",")
-        json_defs += "]"
-        return json_defs
+        return "[" + ",".join(d.toJSON() for d in defs) + "]"
     return ""
 
+def write_jsonl(definitions, fp):
+    serialize.write_jsonl(definitions, fp)
 
-def parse_term(term):
-    definitions = []
-    headings = []
+def read_jsonl(fp):
+    return serialize.read_jsonl(fp, Definition, [VERB, NOUN, ADJECTIVE])
 
-    for heading in term.headings:
-        if heading.title in PARTS_OF_SPEECH:
-            if len(headings) > 0:
-                definitions.append(Definition(term.word, headings))
-                headings = []
-            headings.append(heading)
-        elif heading.title in INFLECTIONS:
-            headings.append(heading)
-        #TODO: I would like to grab Derived terms and Related terms later as well.
-    
-    if len(headings) > 0:
-        definitions.append(Definition(term.word, headings))
+def write_records(definitions, fp):
+    serialize.write_records(definitions, fp)
 
-    return definitions
+def read_records(buffer):
+    return serialize.read_records(buffer, Definition)
 
 
-class Definition:
-
-    def __init__(self, word, headings):
-        self.word = word
-        #self.headings = headings
-        self.part_of_speech = ''
-        self.meanings = []
-        self.inflection = {}
-
-        for heading in headings:
-            self.parse_heading(heading)
-    
-    def parse_heading(self, heading):
-        if heading.title in PARTS_OF_SPEECH:
-            self.part_of_speech = heading.title
-            lines = heading.text.splitlines()
-            for line in lines:
-                if line.strip().startswith('#'):
-                    #TODO: PJC clean up line
-                    self.meanings.append(line)
-
-        elif heading.title in INFLECTIONS:
-            self.inflection['type'] = heading.title
-            if heading.title == 'Conjugation':
-                self.parse_conjugation(heading)
-            elif heading.title == 'Declension':
-                if self.part_of_speech == 'Noun':
-                    self.parse_noun_declension(heading)
-                elif self.part_of_speech == 'Adjective':
-                    self.parse_adj_declension(heading)
-                elif self.part_of_speech == 'Pronoun':
-                    pass #TODO:
-                else:
-                    pass # TODO: log unknown declension type
-    
+def parse_term(term, stats=None):
+    return base.parse_term(term, Definition, stats)
 
-    def parse_adj_declension(self, heading):
-        match = _adj_full_declension_regex.search(heading.text)
-        if match:
-            self.parse_adj_full_declension(match.groupdict()['root1'],match.groupdict()['root2'])
-        else:
-            match = _adj_def_declension_regex.search(heading.text)
-            if match:
-                self.parse_adj_def_declension(match.groupdict()['root'])
+
+class Definition(base.Definition):
+    __slots__ = ()
+
+    PARTS_OF_SPEECH = PARTS_OF_SPEECH
+    INFLECTIONS = INFLECTIONS
+
+    def parse_inflection(self, heading, stats=None):
+        if heading.title == 'Conjugation':
+            self.parse_conjugation(heading, stats)
+        elif heading.title == 'Declension':
+            if self.part_of_speech == 'Noun':
+                self.parse_noun_declension(heading)
+            elif self.part_of_speech == 'Adjective':
+                self.parse_adj_declension(heading)
+            elif self.part_of_speech == 'Pronoun':
+                pass #TODO:
             else:
-                match = _adj_defindef_declension_regex.search(heading.text)
-                if match:
-                    self.parse_adj_defindef_declension(match.groupdict()['root'])
-            #TODO: more else
-
-    
-    def parse_adj_full_declension(self, root1, root2):
-        self.parse_adj_indef_declension(root1)
-        self.parse_adj_def_declension(root1)
-        self.parse_adj_comparative_declension(root2)
-        #TODO: superlative
-
-    
-    def parse_adj_defindef_declension(self, root):
-        self.parse_adj_indef_declension(root)
-        self.parse_adj_def_declension(root)        
-
-    
-    def parse_adj_indef_declension(self, root):
-        self.inflection['Indefinite nominative masculine singular'] = self.word
-        self.inflection['Indefinite nominative feminine singular'] = root + 'a'
-        self.inflection['Indefinite nominative neuter singular'] = root + 'o'
-        self.inflection['Indefinite genitive masculine singular'] = root + 'a'
-        self.inflection['Indefinite genitive feminine singular'] = root + 'e'
-        self.inflection['Indefinite genitive neuter singular'] = root + 'a'
-        self.inflection['Indefinite dative masculine singular'] = root + 'u'
-        self.inflection['Indefinite dative feminine singular'] = root + 'oj'
-        self.inflection['Indefinite dative neuter singular'] = root + 'u'
-        self.inflection['Indefinite accusative masculine inanimate singular'] = self.word
-        self.inflection['Indefinite accusative feminine singular'] = root + 'u'
-        self.inflection['Indefinite accusative neuter singular'] = root + 'o'
-        self.inflection['Indefinite accusative masculine animate singular'] = root + 'a'
-        self.inflection['Indefinite vocative masculine singular'] = self.word
-        self.inflection['Indefinite vocative feminine singular'] = root + 'a'
-        self.inflection['Indefinite vocative neuter singular'] = root + 'o'
-        self.inflection['Indefinite locative masculine singular'] = root + 'u'
-        self.inflection['Indefinite locative feminine singular'] = root + 'oj'
-        self.inflection['Indefinite locative neuter singular'] = root + 'u'
-        self.inflection['Indefinite instrumental masculine singular'] = root + 'im'
-        self.inflection['Indefinite instrumental feminine singular'] = root + 'om'
-        self.inflection['Indefinite instrumental neuter singular'] = root + 'im'
-        self.inflection['Indefinite nominative masculine plural'] = root + 'i'
-        self.inflection['Indefinite nominative feminine plural'] = root + 'e'
-        self.inflection['Indefinite nominative neuter plural'] = root + 'a'
-        self.inflection['Indefinite genitive masculine plural'] = root + 'ih'
-        self.inflection['Indefinite genitive feminine plural'] = root + 'ih'
-        self.inflection['Indefinite genitive neuter plural'] = root + 'ih'
-        self.inflection['Indefinite dative masculine plural'] = root + 'im(a)'
-        self.inflection['Indefinite dative feminine plural'] = root + 'im(a)'
-        self.inflection['Indefinite dative neuter plural'] = root + 'im(a)'
-        self.inflection['Indefinite accusative masculine plural'] = root + 'e'
-        self.inflection['Indefinite accusative feminine plural'] = root + 'e'
-        self.inflection['Indefinite accusative neuter plural'] = root + 'a'
-        self.inflection['Indefinite vocative masculine plural'] = root + 'i'
-        self.inflection['Indefinite vocative feminine plural'] = root + 'e'
-        self.inflection['Indefinite vocative neuter plural'] = root + 'a'
-        self.inflection['Indefinite locative masculine plural'] = root + 'im(a)'
-        self.inflection['Indefinite locative feminine plural'] = root + 'im(a)'
-        self.inflection['Indefinite locative neuter plural'] = root + 'im(a)'
-        self.inflection['Indefinite instrumental masculine plural'] = root + 'im(a)'
-        self.inflection['Indefinite instrumental feminine plural'] = root + 'im(a)'
-        self.inflection['Indefinite instrumental neuter plural'] = root + 'im(a)'
-
-    
-
-    def parse_adj_def_declension(self, root):
-        self.inflection['Definite nominative masculine singular'] = root + 'i'
-        self.inflection['Definite nominative feminine singular'] = root + 'a'
-        self.inflection['Definite nominative neuter singular'] = root + 'o'
-        self.inflection['Definite genitive masculine singular'] = root + 'og(a)'
-        self.inflection['Definite genitive feminine singular'] = root + 'e'
-        self.inflection['Definite genitive neuter singular'] = root + 'og(a)'
-        self.inflection['Definite dative masculine singular'] = root + 'om(u)'
-        self.inflection['Definite dative feminine singular'] = root + 'oj'
-        self.inflection['Definite dative neuter singular'] = root + 'om(u)'
-        self.inflection['Definite accusative masculine inanimate singular'] = root + 'i'
-        self.inflection['Definite accusative masculine animate singular'] = root + 'og(a)'
-        self.inflection['Definite accusative feminine singular'] = root + 'u'
-        self.inflection['Definite accusative neuter singular'] = root + 'o'
-        self.inflection['Definite vocative masculine singular'] = root + 'i'
-        self.inflection['Definite vocative feminine singular'] = root + 'a'
-        self.inflection['Definite vocative neuter singular'] = root + 'o'
-        self.inflection['Definite locative masculine singular'] = root + 'om(u)'
-        self.inflection['Definite locative feminine singular'] = root + 'oj'
-        self.inflection['Definite locative neuter singular'] = root + 'om(u)'
-        self.inflection['Definite instrumental masculine singular'] = root + 'im'
-        self.inflection['Definite instrumental feminine singular'] = root + 'om'
-        self.inflection['Definite instrumental neuter singular'] = root + 'im'
-        self.inflection['Definite nominative masculine plural'] = root + 'i'
-        self.inflection['Definite nominative feminine plural'] = root + 'e'
-        self.inflection['Definite nominative neuter plural'] = root + 'a'
-        self.inflection['Definite genitive masculine plural'] = root + 'ih'
-        self.inflection['Definite genitive feminine plural'] = root + 'ih'
-        self.inflection['Definite genitive neuter plural'] = root + 'ih'
-        self.inflection['Definite dative masculine plural'] = root + 'im(a)'
-        self.inflection['Definite dative feminine plural'] = root + 'im(a)'
-        self.inflection['Definite dative neuter plural'] = root + 'im(a)'
-        self.inflection['Definite accusative masculine plural'] = root + 'e'
-        self.inflection['Definite accusative feminine plural'] = root + 'e'
-        self.inflection['Definite accusative neuter plural'] = root + 'a'
-        self.inflection['Definite vocative masculine plural'] = root + 'i'
-        self.inflection['Definite vocative feminine plural'] = root + 'e'
-        self.inflection['Definite vocative neuter plural'] = root + 'a'
-        self.inflection['Definite locative masculine plural'] = root + 'im(a)'
-        self.inflection['Definite locative feminine plural'] = root + 'im(a)'
-        self.inflection['Definite locative neuter plural'] = root + 'im(a)'
-        self.inflection['Definite instrumental masculine plural'] = root + 'im(a)'
-        self.inflection['Definite instrumental feminine plural'] = root + 'im(a)'
-        self.inflection['Definite instrumental neuter plural'] = root + 'im(a)'
-
-
-    def parse_adj_comparative_declension(self, root):
-        self.inflection['Comparative nominative masculine singular'] = root + 'i'
-        self.inflection['Comparative nominative feminine singular'] = root + 'a'
-        self.inflection['Comparative nominative neuter singular'] = root + 'o'
-        self.inflection['Comparative genitive masculine singular'] = root + 'og(a)'
-        self.inflection['Comparative genitive feminine singular'] = root + 'e'
-        self.inflection['Comparative genitive neuter singular'] = root + 'og(a)'
-        self.inflection['Comparative dative masculine singular'] = root + 'om(u)'
-        self.inflection['Comparative dative feminine singular'] = root + 'oj'
-        self.inflection['Comparative dative neuter singular'] = root + 'om(u)'
-        self.inflection['Comparative accusative masculine inanimate singular'] = root + 'i'
-        self.inflection['Comparative accusative feminine singular'] = root + 'u'
-        self.inflection['Comparative accusative neuter singular'] = root + 'o'
-        self.inflection['Comparative accusative masculine animate singular'] = root + 'og(a)'
-        self.inflection['Comparative vocative masculine singular'] = root + 'i'
-        self.inflection['Comparative vocative feminine singular'] = root + 'a'
-        self.inflection['Comparative vocative neuter singular'] = root + 'o'
-        self.inflection['Comparative locative masculine singular'] = root + 'om(u)'
-        self.inflection['Comparative locative feminine singular'] = root + 'oj'
-        self.inflection['Comparative locative neuter singular'] = root + 'om(u)'
-        self.inflection['Comparative instrumental masculine singular'] = root + 'im'
-        self.inflection['Comparative instrumental feminine singular'] = root + 'om'
-        self.inflection['Comparative instrumental neuter singular'] = root + 'im'
-        self.inflection['Comparative nominative masculine plural'] = root + 'i'
-        self.inflection['Comparative nominative feminine plural'] = root + 'e'
-        self.inflection['Comparative nominative neuter plural'] = root + 'a'
-        self.inflection['Comparative genitive masculine plural'] = root + 'ih'
-        self.inflection['Comparative genitive feminine plural'] = root + 'ih'
-        self.inflection['Comparative genitive neuter plural'] = root + 'ih'
-        self.inflection['Comparative dative masculine plural'] = root + 'im(a)'
-        self.inflection['Comparative dative feminine plural'] = root + 'im(a)'
-        self.inflection['Comparative dative neuter plural'] = root + 'im(a)'
-        self.inflection['Comparative accusative masculine plural'] = root + 'e'
-        self.inflection['Comparative accusative feminine plural'] = root + 'e'
-        self.inflection['Comparative accusative neuter plural'] = root + 'a'
-        self.inflection['Comparative vocative masculine plural'] = root + 'i'
-        self.inflection['Comparative vocative feminine plural'] = root + 'e'
-        self.inflection['Comparative vocative neuter plural'] = root + 'a'
-        self.inflection['Comparative locative masculine plural'] = root + 'im(a)'
-        self.inflection['Comparative locative feminine plural'] = root + 'im(a)'
-        self.inflection['Comparative locative neuter plural'] = root + 'im(a)'
-        self.inflection['Comparative instrumental masculine plural'] = root + 'im(a)'
-        self.inflection['Comparative instrumental feminine plural'] = root + 'im(a)'
-        self.inflection['Comparative instrumental neuter plural'] = root + 'im(a)'
+                pass # TODO: log unknown declension type
 
+    def paradigm(self, inflection_type):
+        if inflection_type == 'Conjugation':
+            return VERB
+        if self.part_of_speech == 'Noun':
+            return NOUN
+        if self.part_of_speech == 'Adjective':
+            return ADJECTIVE
+        return NO_PARADIGM
+
+    def parse_adj_declension(self, heading):
+        # The first sh-adj-* template listed in ADJ_TEMPLATES with all its parameters
+        for match in _adj_template_regex.finditer(heading.text):
+            template = ADJ_TEMPLATES.get(match.group('template'))
+            args = match.group('args').split('|')
+            if template is None or len(args) < template[0] or not all(_word_regex.match(arg) for arg in args[:template[0]]):
+                continue
+            for (labels, endings), root in template[1]:
+                self.inflection.assign(labels, [self.word if ending is None else args[root] + ending for ending in endings])
+            return
+        #TODO: other declension templates
 
 
     def parse_noun_declension(self, heading):
@@ -269,215 +586,18 @@ class Definition:
                 match_count += 1
 
 
-    def parse_conjugation(self, heading):
+    def parse_conjugation(self, heading, stats=None):
         self.inflection['Infinitive'] = self.word
-
-        match_start = -1  
-        match_end = -1
-        form = ''
-        inflected_word = ''
-        match = _conjugation_regex.search(heading.text)
-        while match:
-            if match_start >= 0:
-                match_end = match.start() - 1
-                self.add_inflection(form, inflected_word)
-            match_start = match.start()
-            form = match.groupdict()['form']
-            inflected_word = match.groupdict()['inflected_word']
-            match = _conjugation_regex.search(heading.text, match_start + 1)
-        # Don't forget the last match
-        if match_start >= 0:
-            self.add_inflection(form, inflected_word)
-
-
-    def add_inflection(self, form, inflected_word):
-        if form == 'p.va': 
-            self.inflection['Past verbal adverb'] = inflected_word
-        elif form == 'pr.va': 
-            self.inflection['Present verbal adverb'] = inflected_word
-        elif form == 'vn':
-            self.inflection['Verbal noun'] = inflected_word
-        elif form == 'pr.1s': 
-            self.inflection['First person singular present'] = inflected_word
-        elif form == 'pr.2s': 
-            self.inflection['Second person singular present'] = inflected_word
-        elif form == 'pr.3s': 
-            self.inflection['Third person singular present'] = inflected_word
-        elif form == 'pr.1p': 
-            self.inflection['First person plural present'] = inflected_word
-        elif form == 'pr.2p': 
-            self.inflection['Second person plural present'] = inflected_word
-        elif form == 'pr.3p': 
-            self.inflection['Third person plural present'] = inflected_word
-        elif form == 'f1.hr': 
-            self.inflection['First person singular future I (Croatian)'] = inflected_word + ' ću'
-            self.inflection['Second person singular future I (Croatian)'] = inflected_word + ' ćeš'
-            self.inflection['Third person singular future I (Croatian)'] = inflected_word + ' će'
-            self.inflection['First person plural future I (Croatian)'] = inflected_word + ' ćemo'
-            self.inflection['Second person plural future I (Croatian)'] = inflected_word + ' ćete'
-            self.inflection['Third person plural future I (Croatian)'] = inflected_word + ' će'
-        elif form == 'f1.stem': 
-            self.inflection['First person singular future I'] = inflected_word + 'ću'
-            self.inflection['Second person singular future I'] = inflected_word + 'ćeš'
-            self.inflection['Third person singular future I'] = inflected_word + 'će'
-            self.inflection['First person plural future I'] = inflected_word + 'ćemo'
-            self.inflection['Second person plural future I'] = inflected_word + 'ćete'
-            self.inflection['Third person plural future I'] = inflected_word + 'će'
-        elif form == 'impf.1s': 
-            self.inflection['First person singular past imperfect'] = inflected_word
-        elif form == 'impf.2s': 
-            self.inflection['Second person singular past imperfect'] = inflected_word
-        elif form == 'impf.3s': 
-            self.inflection['Third person singular past imperfect'] = inflected_word
-        elif form == 'impf.1p': 
-            self.inflection['First person plural past imperfect'] = inflected_word
-        elif form == 'impf.2p': 
-            self.inflection['Second person plural past imperfect'] = inflected_word
-        elif form == 'impf.3p': 
-            self.inflection['Third person plural past imperfect'] = inflected_word
-        elif form == 'a.1s': 
-            self.inflection['First person singular past aorist'] = inflected_word
-        elif form == 'a.2s': 
-            self.inflection['Second person singular past aorist'] = inflected_word
-        elif form == 'a.3s': 
-            self.inflection['Third person singular past aorist'] = inflected_word
-        elif form == 'a.1p': 
-            self.inflection['First person plural past aorist'] = inflected_word
-        elif form == 'a.2p': 
-            self.inflection['Second person plural past aorist'] = inflected_word
-        elif form == 'a.3p': 
-            self.inflection['Third person plural past aorist'] = inflected_word
-        elif form == 'impt.2s': 
-            self.inflection['Second person singular imperative'] = inflected_word
-        elif form == 'impt.1p': 
-            self.inflection['First person plural imperative'] = inflected_word
-        elif form == 'impt.2p': 
-            self.inflection['Second person plural imperative'] = inflected_word
-        elif form == 'app.ms': 
-            self.inflection['Active past participle masculine singular'] = inflected_word
-            self.inflection['First person masculine singular future II'] = 'budem ' + inflected_word
-            self.inflection['Second person masculine singular future II'] = 'budeš ' + inflected_word
-            self.inflection['Third person masculine singular future II'] = 'bude ' + inflected_word
-            self.inflection['First person masculine singular past perfect'] = inflected_word + ' sam'
-            self.inflection['Second person masculine singular past perfect'] = inflected_word + ' si'
-            self.inflection['Third person masculine singular past perfect'] = inflected_word + ' je'
-            self.inflection['First person masculine singular past pluperfect'] = 'bio sam ' + inflected_word
-            self.inflection['Second person masculine singular past pluperfect'] = 'bio si ' + inflected_word
-            self.inflection['Third person masculine singular past pluperfect'] = 'bio je ' + inflected_word
-            self.inflection['First person masculine singular conditional I'] = inflected_word + ' bih'
-            self.inflection['Second person masculine singular conditional I'] = inflected_word + ' bi'
-            self.inflection['Third person masculine singular conditional I'] = inflected_word + ' bi'
-            self.inflection['First person masculine singular conditional II'] = 'bio bih ' + inflected_word
-            self.inflection['Second person masculine singular conditional II'] = 'bio bi ' + inflected_word
-            self.inflection['Third person masculine singular conditional II'] = 'bio bi ' + inflected_word
-        elif form == 'app.fs': 
-            self.inflection['Active past participle feminine singular'] = inflected_word
-            self.inflection['First person feminine singular future II'] = 'budem ' + inflected_word
-            self.inflection['Second person feminine singular future II'] = 'budeš ' + inflected_word
-            self.inflection['Third person feminine singular future II'] = 'bude ' + inflected_word
-            self.inflection['First person feminine singular past perfect'] = inflected_word + ' sam'
-            self.inflection['Second person feminine singular past perfect'] = inflected_word + ' si'
-            self.inflection['Third person feminine singular past perfect'] = inflected_word + ' je'
-            self.inflection['First person feminine singular past pluperfect'] = 'bila sam ' + inflected_word
-            self.inflection['Second person feminine singular past pluperfect'] = 'bila si ' + inflected_word
-            self.inflection['Third person feminine singular past pluperfect'] = 'bila je ' + inflected_word
-            self.inflection['First person feminine singular conditional I'] = inflected_word + ' bih'
-            self.inflection['Second person feminine singular conditional I'] = inflected_word + ' bi'
-            self.inflection['Third person feminine singular conditional I'] = inflected_word + ' bi'
-            self.inflection['First person feminine singular conditional II'] = 'bila bih ' + inflected_word
-            self.inflection['Second person feminine singular conditional II'] = 'bila bi ' + inflected_word
-            self.inflection['Third person feminine singular conditional II'] = 'bila bi ' + inflected_word
-        elif form == 'app.ns': 
-            self.inflection['Active past participle neuter singular'] = inflected_word
-            self.inflection['First person neuter singular future II'] = 'budem ' + inflected_word
-            self.inflection['Second person neuter singular future II'] = 'budeš ' + inflected_word
-            self.inflection['Third person neuter singular future II'] = 'bude ' + inflected_word
-            self.inflection['First person neuter singular past perfect'] = inflected_word + ' sam'
-            self.inflection['Second person neuter singular past perfect'] = inflected_word + ' si'
-            self.inflection['Third person neuter singular past perfect'] = inflected_word + ' je'
-            self.inflection['First person neuter singular past pluperfect'] = 'bilo sam ' + inflected_word
-            self.inflection['Second person neuter singular past pluperfect'] = 'bilo si ' + inflected_word
-            self.inflection['Third person neuter singular past pluperfect'] = 'bilo je ' + inflected_word
-            self.inflection['First person neuter singular conditional I'] = inflected_word + ' bih'
-            self.inflection['Second person neuter singular conditional I'] = inflected_word + ' bi'
-            self.inflection['Third person neuter singular conditional I'] = inflected_word + ' bi'
-            self.inflection['First person neuter singular conditional II'] = 'bilo bih ' + inflected_word
-            self.inflection['Second person neuter singular conditional II'] = 'bilo bi ' + inflected_word
-            self.inflection['Third person neuter singular conditional II'] = 'bilo bi ' + inflected_word
-        elif form == 'app.mp': 
-            self.inflection['Active past participle masculine plural'] = inflected_word
-            self.inflection['First person masculine plural future II'] = 'budemo ' + inflected_word
-            self.inflection['Second person masculine plural future II'] = 'budete ' + inflected_word
-            self.inflection['Third person masculine plural future II'] = 'budu ' + inflected_word
-            self.inflection['First person masculine plural past perfect'] = inflected_word + ' smo'
-            self.inflection['Second person masculine plural past perfect'] = inflected_word + ' ste'
-            self.inflection['Third person masculine plural past perfect'] = inflected_word + ' su'
-            self.inflection['First person masculine plural past pluperfect'] = 'bili smo ' + inflected_word
-            self.inflection['Second person masculine plural past pluperfect'] = 'bili ste ' + inflected_word
-            self.inflection['Third person masculine plural past pluperfect'] = 'bili su ' + inflected_word
-            self.inflection['First person masculine plural conditional I'] = inflected_word + ' bismo'
-            self.inflection['Second person masculine plural conditional I'] = inflected_word + ' biste'
-            self.inflection['Third person masculine plural conditional I'] = inflected_word + ' bi'
-            self.inflection['First person masculine plural conditional II'] = 'bili bismo ' + inflected_word
-            self.inflection['Second person masculine plural conditional II'] = 'bili biste ' + inflected_word
-            self.inflection['Third person masculine plural conditional II'] = 'bili bi ' + inflected_word
-        elif form == 'app.fp': 
-            self.inflection['Active past participle feminine plural'] = inflected_word
-            self.inflection['First person feminine plural future II'] = 'budemo ' + inflected_word
-            self.inflection['Second person feminine plural future II'] = 'budete ' + inflected_word
-            self.inflection['Third person feminine plural future II'] = 'budu ' + inflected_word
-            self.inflection['First person feminine plural past perfect'] = inflected_word + ' smo'
-            self.inflection['Second person feminine plural past perfect'] = inflected_word + ' ste'
-            self.inflection['Third person feminine plural past perfect'] = inflected_word + ' su'
-            self.inflection['First person feminine plural past pluperfect'] = 'bile smo ' + inflected_word
-            self.inflection['Second person feminine plural past pluperfect'] = 'bile ste ' + inflected_word
-            self.inflection['Third person feminine plural past pluperfect'] = 'bile su ' + inflected_word
-            self.inflection['First person feminine plural conditional I'] = inflected_word + ' bismo'
-            self.inflection['Second person feminine plural conditional I'] = inflected_word + ' biste'
-            self.inflection['Third person feminine plural conditional I'] = inflected_word + ' bi'
-            self.inflection['First person feminine plural conditional II'] = 'bile bismo ' + inflected_word
-            self.inflection['Second person feminine plural conditional II'] = 'bile biste ' + inflected_word
-            self.inflection['Third person feminine plural conditional II'] = 'bile bi ' + inflected_word
-        elif form == 'app.np': 
-            self.inflection['Active past participle neuter plural'] = inflected_word
-            self.inflection['First person neuter plural future II'] = 'budemo ' + inflected_word
-            self.inflection['Second person neuter plural future II'] = 'budete ' + inflected_word
-            self.inflection['Third person neuter plural future II'] = 'budu ' + inflected_word
-            self.inflection['First person neuter plural past perfect'] = inflected_word + ' smo'
-            self.inflection['Second person neuter plural past perfect'] = inflected_word + ' ste'
-            self.inflection['Third person neuter plural past perfect'] = inflected_word + ' su'
-            self.inflection['First person neuter plural past pluperfect'] = 'bila smo ' + inflected_word
-            self.inflection['Second person neuter plural past pluperfect'] = 'bila ste ' + inflected_word
-            self.inflection['Third person neuter plural past pluperfect'] = 'bila su ' + inflected_word
-            self.inflection['First person neuter plural conditional I'] = inflected_word + ' bismo'
-            self.inflection['Second person neuter plural conditional I'] = inflected_word + ' biste'
-            self.inflection['Third person neuter plural conditional I'] = inflected_word + ' bi'
-            self.inflection['First person neuter plural conditional II'] = 'bila bismo ' + inflected_word
-            self.inflection['Second person neuter plural conditional II'] = 'bila biste ' + inflected_word
-            self.inflection['Third person neuter plural conditional II'] = 'bila bi ' + inflected_word
-        elif form == 'ppp.ms':
-            self.inflection['Passive past participle masculine singular'] = inflected_word
-        elif form == 'ppp.fs':
-            self.inflection['Passive past participle feminine singular'] = inflected_word
-        elif form == 'ppp.ns':
-            self.inflection['Passive past participle neuter singular'] = inflected_word
-        elif form == 'ppp.mp':
-            self.inflection['Passive past participle masculine plural'] = inflected_word
-        elif form == 'ppp.fp':
-            self.inflection['Passive past participle feminine plural'] = inflected_word
-        elif form == 'ppp.np':
-            self.inflection['Passive past participle neuter plural'] = inflected_word
-        else:
-            print('Unknown form: ', form, ' ', inflected_word, ' (', self.word, ' ')
-
-    def _try(self, o): 
-        try: 
-            return o.__dict__ 
-        except: 
-            return str(o)
-
-    def toJSON(self):
-        return json.dumps(self, default=lambda o: self._try(o), sort_keys=True, indent=0, separators=(',',':')).replace('\n', '')
-
-    def __str__(self):
-        return "{0}: {1}".format(self.part_of_speech, self.meanings)
\ No newline at end of file
+        for match in _conjugation_regex.finditer(heading.text):
+            self.add_inflection(match.group('form'), match.group('inflected_word'), stats)
+
+
+    def add_inflection(self, form, inflected_word, stats=None):
+        labels = CONJUGATION_FORMS.get(form)
+        if labels is None:
+            import logging
+            logging.getLogger(__name__).warning('Unknown form %s=%s in %s', form, inflected_word, self.word)
+            if stats is not None:
+                stats.add('unknown_forms')
+            return
+        self.inflection.assign(_CONJUGATION_LABELS[form], [prefix + inflected_word + suffix for _, prefix, suffix in labels])
@@ -0,0 +1,149 @@
+import os
+import re
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, wait
+from itertools import islice
+from yawp.lazy import LazyRegex
+from yawp.parser import Entry
+
+Page = namedtuple('Page', ['title', 'namespace', 'revision', 'text'])
+
+_next_language_regex = LazyRegex(r"^==[^=]", re.RegexFlag.MULTILINE)
+_dump_file_regex = LazyRegex(r"\.xml(\.bz2)?$")
+
+
+def open_dump(path):
+    if path.endswith('.bz2'):
+        import bz2
+        return bz2.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _local_name(tag):
+    # Dumps put everything in the export-0.x namespace, e.g. {http://www.mediawiki.org/xml/export-0.10/}page
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_pages(source, namespace=0):
+    # source is a path or a binary file object. Elements are cleared as soon as
+    # a page has been yielded so memory stays flat no matter how large the dump is.
+    # Pass namespace=None to get pages from every namespace.
+    from xml.etree.ElementTree import iterparse
+    f = open_dump(source) if isinstance(source, str) else source
+    try:
+        root = None
+        title = ns = revision = text = None
+        in_revision = False
+        for event, elem in iterparse(f, events=('start', 'end')):
+            tag = _local_name(elem.tag)
+            if event == 'start':
+                if root is None:
+                    root = elem
+                elif tag == 'revision':
+                    # A page in an incremental dump carries every new revision;
+                    # the id and text kept are both the last one's
+                    in_revision = True
+                    revision = None
+                continue
+
+            if tag == 'title':
+                title = elem.text
+            elif tag == 'ns':
+                ns = int(elem.text)
+            elif tag == 'id' and in_revision and revision is None:
+                revision = int(elem.text)
+            elif tag == 'text':
+                text = elem.text or ''
+            elif tag == 'revision':
+                in_revision = False
+            elif tag == 'page':
+                if namespace is None or ns == namespace:
+                    yield Page(title, ns, revision, text)
+                title = ns = revision = text = None
+                root.clear()
+    finally:
+        if f is not source:
+            f.close()
+
+
+def language_section(text, language):
+    # Returns just the ==language== section of a page's wikitext, or None
+    start = text.find('\n=={0}==\n'.format(language))
+    if start >= 0:
+        start += 1
+    elif text.startswith('=={0}==\n'.format(language)):
+        start = 0
+    else:
+        return None
+    match = _next_language_regex.search(text, start + 1)
+    return text[start:match.start() if match else len(text)]
+
+
+def iter_entries(source, language=None):
+    for page in iter_pages(source):
+        text = page.text
+        if language:
+            text = language_section(text, language)
+            if text is None:
+                continue
+        yield Entry(text, page.title)
+
+
+def iter_changes(source):
+    # Normalizes a change feed to (title, revision, text or None). source is one of
+    #  - an adds-changes (or any pages-articles) XML dump, plain or bz2
+    #  - a text file of 'title<TAB>revision id' lines; the text then has to be fetched
+    #  - an iterable of (title, revision) or (title, revision, text) tuples
+    if isinstance(source, str):
+        if _dump_file_regex.search(source):
+            for page in iter_pages(source):
+                yield page.title, page.revision, page.text
+        else:
+            with open(source, encoding='utf-8') as f:
+                for line in f:
+                    title, _, revision = line.rstrip('\n').rpartition('\t')
+                    if title:
+                        yield title, int(revision), None
+    else:
+        for change in source:
+            title, revision = change[0], change[1]
+            yield title, revision, change[2] if len(change) > 2 else None
+
+
+def iter_batches(items, batch_size):
+    items = iter(items)
+    batch = list(islice(items, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(items, batch_size))
+
+
+def map_batches(func, items, workers=None, batch_size=100, ordered=True, max_in_flight=None):
+    # Runs func(batch) on a process pool and yields every item of every returned list.
+    # func must be a module level function so it can be pickled. At most
+    # max_in_flight batches are queued at once, so a huge dump is never read
+    # ahead of the workers. With ordered=False results come back as soon as
+    # any batch finishes.
+    from concurrent.futures import ProcessPoolExecutor
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+    batches = iter_batches(items, batch_size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(func, batch))
+            if len(pending) >= max_in_flight:
+                yield from _next_results(pending, ordered)
+        while pending:
+            yield from _next_results(pending, ordered)
+
+
+def _next_results(pending, ordered):
+    if ordered:
+        return pending.popleft().result()
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    results = []
+    for future in done:
+        pending.remove(future)
+        results.extend(future.result())
+    return results
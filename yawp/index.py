@@ -0,0 +1,84 @@
+import os
+from yawp.lazy import LazyRegex
+from collections import namedtuple
+
+Match = namedtuple('Match', ['form', 'lemma', 'part_of_speech', 'slot'])
+
+LEMMA_SLOT = 'Lemma'
+
+_optional_regex = LazyRegex(r"\(([^()]*)\)")
+
+
+def expand_optional(form):
+    # 'dobrim(a)' -> ['dobrim', 'dobrima']; Wiktionary marks optional endings with parentheses
+    match = _optional_regex.search(form)
+    if not match:
+        return [form]
+    head, tail = form[:match.start()], form[match.end():]
+    return [variant for rest in expand_optional(tail) for variant in (head + rest, head + match.group(1) + rest)]
+
+
+def iter_forms(entries, normalize):
+    # (key, form, lemma, part of speech, slot) for every lemma and inflected form
+    # in entries, an iterable of (word, definitions)
+    for word, definitions in entries:
+        for definition in definitions or []:
+            seen = set()
+            forms = [(LEMMA_SLOT, word)] + [(slot, form) for slot, form in definition.inflection.items() if slot != 'type']
+            for slot, form in forms:
+                for variant in expand_optional(form):
+                    key = normalize(variant)
+                    if (key, slot) not in seen:
+                        seen.add((key, slot))
+                        yield key, variant, word, definition.part_of_speech, slot
+
+
+class FormIndex:
+    # Read-only reverse index from a normalized inflected form to
+    # (form, lemma, part of speech, slot), stored in SQLite.
+
+    def __init__(self, path, normalize):
+        self.path = path
+        self.normalize = normalize
+        import sqlite3
+        from urllib.parse import quote
+        # The path goes into a URI, so #, ? and % in it must be escaped; a Windows
+        # drive path becomes file:/C:/...
+        uri = quote(os.path.abspath(path).replace(os.sep, '/'), safe='/:')
+        if not uri.startswith('/'):
+            uri = '/' + uri
+        # immutable=1 skips locking; the file is never written once built
+        self._conn = sqlite3.connect('file:{0}?mode=ro&immutable=1'.format(uri), uri=True, check_same_thread=False)
+        self._conn.execute('PRAGMA mmap_size = 268435456')
+
+    @classmethod
+    def build(cls, path, entries, normalize):
+        # entries is an iterable of (word, definitions), e.g. serbocroatian.iter_dump()
+        import sqlite3
+        tmp = path + '.tmp'
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        conn = sqlite3.connect(tmp)
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute('CREATE TABLE forms (key TEXT NOT NULL, form TEXT NOT NULL, lemma TEXT NOT NULL, part_of_speech TEXT, slot TEXT)')
+        with conn:
+            conn.executemany('INSERT INTO forms VALUES (?, ?, ?, ?, ?)', iter_forms(entries, normalize))
+            conn.execute('CREATE INDEX forms_key ON forms (key)')
+        conn.close()
+        os.replace(tmp, path)
+        return cls(path, normalize)
+
+    def lookup(self, token):
+        rows = self._conn.execute('SELECT form, lemma, part_of_speech, slot FROM forms WHERE key = ?',
+                                  (self.normalize(token),)).fetchall()
+        return [Match(*row) for row in rows]
+
+    def lemmas(self, token):
+        return list(dict.fromkeys(match.lemma for match in self.lookup(token)))
+
+    def __contains__(self, token):
+        return self._conn.execute('SELECT 1 FROM forms WHERE key = ? LIMIT 1', (self.normalize(token),)).fetchone() is not None
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,17 @@
+import re
+
+
+class LazyRegex:
+    # Stands in for re.compile(pattern, flags) but compiles on first use, so
+    # importing a module doesn't pay for patterns its caller never runs. The
+    # compiled pattern's attributes are copied onto the instance as they are
+    # looked up, so later calls cost the same as on the pattern itself.
+
+    def __init__(self, pattern, flags=0):
+        self._pattern = pattern
+        self._flags = flags
+
+    def __getattr__(self, name):
+        value = getattr(re.compile(self._pattern, self._flags), name)
+        setattr(self, name, value)
+        return value
@@ -0,0 +1,146 @@
+import mmap
+import os
+import struct
+from yawp import serialize
+
+# Snapshot layout, all little-endian:
+#
+#   header   MAGIC, VERSION, key count, offsets of the index, keys and data blocks
+#   index    one fixed-size slot per key, sorted by the key's UTF-8 bytes:
+#            key offset, key length, data offset, data length, revision id
+#   keys     the UTF-8 keys back to back
+#   data     per key, its definitions as serialize.pack_record() records
+#
+# Everything is read through one read-only mmap, so worker processes opening
+# the same file share its pages and nothing is parsed at load time.
+MAGIC = b'YAWPLEX'
+VERSION = 2
+
+_header = struct.Struct('<7sHIQQQ')
+_slot = struct.Struct('<QIQIQ')
+
+
+class LexiconWriter:
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+
+    def add(self, word, definitions, revision=0):
+        self.add_packed(word, b''.join(serialize.pack_record(d) for d in definitions), revision)
+
+    def add_packed(self, word, data, revision=0):
+        self._entries[word.encode('utf-8')] = (bytes(data), revision or 0)
+
+    def remove(self, word):
+        self._entries.pop(word.encode('utf-8'), None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def close(self):
+        keys = sorted(self._entries)
+        index_offset = _header.size
+        keys_offset = index_offset + _slot.size * len(keys)
+        data_offset = keys_offset + sum(len(key) for key in keys)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(_header.pack(MAGIC, VERSION, len(keys), index_offset, keys_offset, data_offset))
+            key_position = data_position = 0
+            for key in keys:
+                data, revision = self._entries[key]
+                f.write(_slot.pack(key_position, len(key), data_position, len(data), revision))
+                key_position += len(key)
+                data_position += len(data)
+            for key in keys:
+                f.write(key)
+            for key in keys:
+                f.write(self._entries[key][0])
+        # Readers holding the old file keep their mapping; new ones see the new snapshot
+        os.replace(tmp, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is None:
+            self.close()
+
+
+class Lexicon:
+
+    def __init__(self, path, cls):
+        self.path = path
+        self.cls = cls
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, version, self._count, self._index, self._keys, self._data = _header.unpack_from(self._view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('{0} is not a version {1} yawp lexicon'.format(path, VERSION))
+
+    def __len__(self):
+        return self._count
+
+    def _slot(self, i):
+        return _slot.unpack_from(self._view, self._index + i * _slot.size)
+
+    def _key(self, i):
+        key_offset, key_length = self._slot(i)[:2]
+        start = self._keys + key_offset
+        return bytes(self._view[start:start + key_length])
+
+    def _find(self, word):
+        key = word.encode('utf-8')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._key(low) == key:
+            return low
+        return None
+
+    def __contains__(self, word):
+        return self._find(word) is not None
+
+    def keys(self):
+        for i in range(self._count):
+            yield self._key(i).decode('utf-8')
+
+    def items(self):
+        # (word, packed records, revision) in key order, without any lookups
+        for i in range(self._count):
+            key_offset, key_length, data_offset, data_length, revision = self._slot(i)
+            key = self._keys + key_offset
+            data = self._data + data_offset
+            yield str(self._view[key:key + key_length], 'utf-8'), self._view[data:data + data_length], revision
+
+    def packed(self, word):
+        # The word's packed records as a memoryview into the file, or None
+        i = self._find(word)
+        if i is None:
+            return None
+        _, _, data_offset, data_length, _ = self._slot(i)
+        start = self._data + data_offset
+        return self._view[start:start + data_length]
+
+    def revision(self, word):
+        i = self._find(word)
+        return self._slot(i)[4] if i is not None else None
+
+    def get(self, word):
+        data = self.packed(word)
+        if data is None:
+            return None
+        return [serialize.decode(record, self.cls) for record in serialize.iter_packed(data)]
+
+    def close(self):
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Somebody still holds a slice from packed()/items(); the map goes when they do
+            pass
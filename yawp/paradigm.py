@@ -0,0 +1,109 @@
+import sys
+from collections.abc import MutableMapping
+
+# name -> Paradigm, so serialized inflections can find their schema again
+PARADIGMS = {}
+
+
+class Paradigm:
+    # A shared, ordered schema of inflection labels. Every Inflection using the
+    # paradigm stores its forms in a list aligned to these labels, so the long
+    # label strings exist once per process instead of once per Definition.
+    __slots__ = ('name', 'labels', 'index', 'offsets')
+
+    def __init__(self, name, *groups):
+        self.name = name
+        labels = []
+        self.offsets = {}
+        for group in groups:
+            group = tuple(sys.intern(label) for label in group)
+            self.offsets[group] = len(labels)
+            labels.extend(group)
+        self.labels = tuple(labels)
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        PARADIGMS[name] = self
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __repr__(self):
+        return 'Paradigm({0!r}, {1} labels)'.format(self.name, len(self.labels))
+
+
+class Inflection(MutableMapping):
+    # Dict-like view of one word's forms. Labels outside the paradigm (a
+    # template we don't know about yet) go to a small overflow dict.
+    __slots__ = ('paradigm', 'values', 'extra')
+
+    def __init__(self, paradigm, values=None, extra=None):
+        self.paradigm = paradigm
+        self.values = values if values is not None else [None] * len(paradigm.labels)
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, paradigm, forms):
+        values = [None] * len(paradigm.labels)
+        extra = None
+        index = paradigm.index
+        for label, form in forms.items():
+            i = index.get(label)
+            if i is not None:
+                values[i] = form
+            else:
+                if extra is None:
+                    extra = {}
+                extra[sys.intern(label)] = form
+        return cls(paradigm, values, extra)
+
+    def assign(self, group, forms):
+        # Fast path for writing a whole group of labels the paradigm was built from
+        start = self.paradigm.offsets.get(group)
+        if start is None:
+            for label, form in zip(group, forms):
+                self[label] = form
+        else:
+            self.values[start:start + len(group)] = forms
+
+    def __getitem__(self, label):
+        i = self.paradigm.index.get(label)
+        if i is not None:
+            form = self.values[i]
+            if form is not None:
+                return form
+        elif self.extra and label in self.extra:
+            return self.extra[label]
+        raise KeyError(label)
+
+    def __setitem__(self, label, form):
+        i = self.paradigm.index.get(label)
+        if i is not None:
+            self.values[i] = form
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[sys.intern(label)] = form
+
+    def __delitem__(self, label):
+        i = self.paradigm.index.get(label)
+        if i is not None and self.values[i] is not None:
+            self.values[i] = None
+        elif self.extra and label in self.extra:
+            del self.extra[label]
+        else:
+            raise KeyError(label)
+
+    def __iter__(self):
+        for label, form in zip(self.paradigm.labels, self.values):
+            if form is not None:
+                yield label
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return len(self.values) - self.values.count(None) + (len(self.extra) if self.extra else 0)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+NO_PARADIGM = Paradigm('none', ('type',))
@@ -1,80 +1,392 @@
 import re
-import requests
+import threading
+import time
+import weakref
+from collections import namedtuple
+from yawp.lazy import LazyRegex
 
-_language_regex = re.compile(r"^==(?P<lang>[\w\s\-]+)==$", re.RegexFlag.MULTILINE)
-_heading_regex = re.compile(r"^===+(?P<heading>[\w\s\-]+)===+$", re.RegexFlag.MULTILINE)
+_language_regex = LazyRegex(r"^==(?P<lang>[\w\s\-]+)==$", re.RegexFlag.MULTILINE)
+_heading_regex = LazyRegex(r"^===+(?P<heading>[\w\s\-]+)===+$", re.RegexFlag.MULTILINE)
+# Matches language (==X==) and heading (===X===, ====X====, ...) lines alike
+_section_regex = LazyRegex(r"^(?:==(?P<lang>[\w\s\-]+)==|===+(?P<heading>[\w\s\-]+)===+)$", re.RegexFlag.MULTILINE)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Connections kept per parser unless pool_size says otherwise
+DEFAULT_POOL_SIZE = 10
+# MediaWiki caps titles= at 50 per query for normal clients
+BATCH_SIZE = 50
+
+Revision = namedtuple('Revision', ['title', 'revision', 'text'])
 
 class Entry:
 
-    def __init__(self, text, search_term):        
-        self.terms =[]
+    def __init__(self, text, search_term, lazy=False):
         self.search_term = search_term
-        self.parse(text)
-    
+        self.text = text
+        self._terms = None
+        self._spans = None
+        if lazy:
+            self.locate(text)
+        else:
+            self.parse(text)
+
+    @property
+    def terms(self):
+        if self._terms is None:
+            self._terms = [self.term(language) for language in self.languages]
+        return self._terms
+
+    @property
+    def languages(self):
+        if self._spans is None:
+            return [term.language for term in self._terms]
+        return list(self._spans)
+
+    def term(self, language):
+        # Returns the Term for one language, or None if the page has no such section.
+        # In lazy mode only that language's headings are ever scanned.
+        if self._spans is None:
+            for term in self._terms:
+                if term.language == language:
+                    return term
+            return None
+        span = self._spans.get(language)
+        if span is None:
+            return None
+        if not isinstance(span, Term):
+            span = self._spans[language] = Term(self.text, language, self.search_term, span[0], span[1])
+        return span
+
+    def locate(self, text):
+        # Lazy mode: only find where each ==language== section starts and ends
+        self._spans = {}
+        language = None
+        start = -1
+        for match in _language_regex.finditer(text):
+            if language is not None:
+                self._spans.setdefault(language, (start, match.start() - 1))
+            language = match.group('lang')
+            start = match.start()
+        if language is not None:
+            self._spans.setdefault(language, (start, len(text)))
+
     def parse(self, text):
-        match_start = -1   
-        match_end = -1
-        language = ''
-        match = _language_regex.search(text)
-        while match:
-            if match_start >= 0:
-                match_end = match.start() - 1
-                self.terms.append(Term(text[match_start:match_end], language, self.search_term))
-            match_start = match.start()
-            language = match.groupdict()['lang']
-            match = _language_regex.search(text, match_start + 1)
+        # One finditer sweep over the page finds every language and heading line.
+        # Terms and headings only keep (start, end) offsets into text; nothing is
+        # sliced until somebody reads Term.text or Heading.text.
+        language = None
+        term_start = -1
+        headings = []
+        heading = None
+        heading_start = -1
+        self._terms = []
+        for match in _section_regex.finditer(text):
+            if match.lastgroup == 'lang':
+                if heading is not None:
+                    headings.append(Heading(text, heading, heading_start, match.start() - 1))
+                if language is not None:
+                    self._terms.append(Term(text, language, self.search_term, term_start, match.start() - 1, headings))
+                language = match.group('lang')
+                term_start = match.start()
+                headings = []
+                heading = None
+            elif language is not None:
+                if heading is not None:
+                    headings.append(Heading(text, heading, heading_start, match.start() - 1))
+                heading = match.group('heading')
+                heading_start = match.start()
         # Don't forget the last match
-        if match_start >=0:
-            self.terms.append(Term(text[match_start:], language, self.search_term))
+        if heading is not None:
+            headings.append(Heading(text, heading, heading_start, len(text)))
+        if language is not None:
+            self._terms.append(Term(text, language, self.search_term, term_start, len(text), headings))
 
 
 class Term:
+    __slots__ = ('language', 'word', 'source', 'start', 'end', 'headings')
 
-    def __init__(self, text, language, search_term):
+    def __init__(self, text, language, search_term, start=0, end=None, headings=None):
         self.language = language
         self.word = search_term
-        self.headings = []        
+        self.source = text
+        self.start = start
+        self.end = len(text) if end is None else end
+        self.headings = []
         #self.parts_of_speech = []
-        self.parse(text)
+        if headings is None:
+            self.parse(text)
+        else:
+            self.headings = headings
 
-    def parse(self, text):
-        #print(self.language)
-        #print(self.word)
+    @property
+    def text(self):
+        return self.source[self.start:self.end]
 
-        match_start = -1  
-        match_end = -1
+    def parse(self, text):
+        match_start = -1
         heading = ''
-        match = _heading_regex.search(text)
-        while match:
+        for match in _heading_regex.finditer(text, self.start, self.end):
             if match_start >= 0:
-                match_end = match.start() - 1
-                self.headings.append(Heading(text[match_start:match_end], heading))
+                self.headings.append(Heading(text, heading, match_start, match.start() - 1))
             match_start = match.start()
-            heading = match.groupdict()['heading']
-            match = _heading_regex.search(text, match_start + 1)
+            heading = match.group('heading')
         # Don't forget the last match
-        if match_start >=0:
-            self.headings.append(Heading(text[match_start:], heading))
+        if match_start >= 0:
+            self.headings.append(Heading(text, heading, match_start, self.end))
 
 
 class Heading:
+    __slots__ = ('title', 'source', 'start', 'end', '_text')
 
-    def __init__(self, text, title):
+    def __init__(self, text, title, start=0, end=None):
         self.title = title
-        self.text = text
-        #print(text)
+        self.source = text
+        self.start = start
+        self.end = len(text) if end is None else end
+        self._text = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.source[self.start:self.end]
+        return self._text
+
+
+class RateLimiter:
+
+    def __init__(self, rate):
+        # rate is the number of requests per second allowed to the host
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
 
 
 class YAWiktionaryParser:
 
-    def __init__(self):
-        self.site = 'en'
+    def __init__(self, site='en', base_url=None, session=None, transport=None,
+                 pool_size=DEFAULT_POOL_SIZE, timeout=(3.05, 30), retries=3, backoff_factor=0.5, cache=None, rate_limit=None,
+                 stats=None):
+        self.site = site
+        self.cache = cache
+        # Optional yawp.stats.Stats collecting timings and counters
+        self.stats = stats
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        # base_url lets tests point the parser at a local stand-in server
+        self.base_url = (base_url or 'https://{0}.wiktionary.org').format(self.site).rstrip('/')
+        self.timeout = timeout
+        self._session = session
+        self._local = threading.local()
+        # Weak, so a thread's session goes with the thread; thread-per-request
+        # servers would otherwise pile up one per request
+        self._sessions = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._transport = transport
+        self._transport_options = (pool_size, retries, backoff_factor)
 
-    def get(self, term):
-        r = requests.get('https://{0}.wiktionary.org/wiki/{1}?action=raw'.format(self.site, term))
-        if r.status_code == 200:
-            return Entry(r.text, term)
+    @property
+    def transport(self):
+        # Built on the first request, so a parser that is only ever answered
+        # from its cache never imports requests
+        if self._transport is None:
+            with self._lock:
+                if self._transport is None:
+                    self._transport = self._create_transport(*self._transport_options)
+        return self._transport
+
+    def _create_transport(self, pool_size, retries, backoff_factor):
+        # requests re-exports the urllib3 it uses (vendored in the pinned 2.13),
+        # so this works without urllib3 installed as a package of its own
+        from requests.adapters import HTTPAdapter, Retry
+        retry = Retry(total=retries, backoff_factor=backoff_factor,
+                      status_forcelist=RETRY_STATUSES, raise_on_status=False)
+        return HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    @property
+    def session(self):
+        # A requests.Session carries cookies and other state that threads should
+        # not share, so every thread gets its own. They all mount the same
+        # transport and so draw from one connection pool.
+        if self._session is not None:
+            return self._session
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            session = requests.Session()
+            session.mount(self.base_url, self.transport)
+            self._local.session = session
+            with self._lock:
+                self._sessions.add(session)
+        return session
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+        with self._lock:
+            sessions = list(self._sessions)
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+        if self._transport is not None:
+            self._transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get(self, term, lazy=False):
+        text = self.get_raw(term)
+        if text is not None:
+            return self._entry(text, term, lazy)
         return None
 
-        
-        
\ No newline at end of file
+    def _entry(self, text, term, lazy):
+        if self.stats is None:
+            return Entry(text, term, lazy)
+        start = time.perf_counter()
+        entry = Entry(text, term, lazy)
+        self.stats.observe('sections', time.perf_counter() - start)
+        self.stats.add('sections_scanned', len(entry.languages))
+        return entry
+
+    def _send(self, url, **kwargs):
+        if self.rate_limiter:
+            self.rate_limiter.wait()
+        if self.stats is None:
+            return self.session.get(url, timeout=self.timeout, **kwargs)
+        start = time.perf_counter()
+        r = self.session.get(url, timeout=self.timeout, **kwargs)
+        self.stats.observe('fetch', time.perf_counter() - start)
+        self.stats.add('fetches')
+        self.stats.add('bytes_downloaded', len(r.content))
+        return r
+
+    def _cached(self, term):
+        cached = self.cache.get(self.site, term) if self.cache is not None else None
+        if self.stats is not None and self.cache is not None:
+            self.stats.add('cache_hits' if cached and cached.fresh else 'cache_misses')
+        return cached
+
+    def get_raw(self, term):
+        cached = self._cached(term)
+        if cached and cached.fresh:
+            return cached.text
+
+        headers = {}
+        if cached:
+            # Stale copy: ask the server whether it is still current
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+        r = self._send('{0}/wiki/{1}?action=raw'.format(self.base_url, term), headers=headers)
+        if r.status_code == 304 and cached:
+            self.cache.touch(self.site, term)
+            if self.stats is not None:
+                self.stats.add('cache_revalidated')
+            return cached.text
+        if r.status_code == 200:
+            if self.cache is not None:
+                self.cache.put(self.site, term, r.text, r.headers.get('ETag'), r.headers.get('Last-Modified'))
+            return r.text
+        if r.status_code == 404:
+            # No page by that name: a real answer, unlike an error that outlasted
+            # the retries, which is raised so callers never mistake it for one
+            return None
+        r.raise_for_status()
+        from requests import HTTPError
+        raise HTTPError('Unexpected status {0} for {1}'.format(r.status_code, r.url), response=r)
+
+    def get_batch(self, terms, lazy=False):
+        # Like get() for many terms at once; returns {term: Entry or None}
+        entries = {}
+        for term, text in self.get_raw_batch(terms).items():
+            entries[term] = self._entry(text, term, lazy) if text is not None else None
+        return entries
+
+    def get_raw_batch(self, terms):
+        # Fetches wikitext for up to BATCH_SIZE titles per api.php request,
+        # following normalization and redirects back to the terms asked for.
+        texts = {}
+        missing = []
+        for term in dict.fromkeys(terms):
+            cached = self._cached(term)
+            if cached and cached.fresh:
+                texts[term] = cached.text
+            else:
+                missing.append(term)
+
+        for start in range(0, len(missing), BATCH_SIZE):
+            chunk = missing[start:start + BATCH_SIZE]
+            pages = self.query_revisions(chunk)
+            for term in chunk:
+                page = pages.get(term)
+                texts[term] = page.text if page else None
+                if page and self.cache is not None:
+                    self.cache.put(self.site, term, page.text, revision=page.revision)
+        return texts
+
+    def query_revisions(self, titles):
+        # Returns {title: Revision} for the titles that exist, keyed by the title as given
+        params = {
+            'action': 'query',
+            'prop': 'revisions',
+            'rvprop': 'content|ids',
+            'rvslots': 'main',
+            'redirects': 1,
+            'format': 'json',
+            'formatversion': 2,
+            'titles': '|'.join(titles),
+        }
+        aliases = {}
+        revisions = {}
+        cont = {}
+        while True:
+            r = self._send('{0}/w/api.php'.format(self.base_url), params=dict(params, **cont))
+            r.raise_for_status()
+            data = r.json()
+            query = data.get('query', {})
+            for alias in query.get('normalized', []) + query.get('redirects', []):
+                aliases[alias['from']] = alias['to']
+            for page in query.get('pages', []):
+                if page.get('missing') or not page.get('revisions'):
+                    continue
+                revision = page['revisions'][0]
+                revisions[page['title']] = Revision(page['title'], revision['revid'], revision['slots']['main']['content'])
+            cont = data.get('continue')
+            if not cont:
+                break
+
+        results = {}
+        for title in titles:
+            resolved = title
+            seen = set()
+            while resolved in aliases and resolved not in seen:
+                seen.add(resolved)
+                resolved = aliases[resolved]
+            if resolved in revisions:
+                results[title] = revisions[resolved]
+        return results
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared_parser():
+    # The process-wide parser used when callers don't pass their own. It is
+    # created on first use and is safe to use from any number of threads.
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = YAWiktionaryParser()
+    return _shared
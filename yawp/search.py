@@ -0,0 +1,221 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from yawp.index import Match, iter_forms
+
+Suggestion = namedtuple('Suggestion', ['form', 'lemma', 'part_of_speech', 'slot', 'distance'])
+
+# A character trie over normalized forms, laid out as flat columns of
+# little-endian uint32 so a query walks it straight from the mmap:
+#
+#   header   MAGIC, VERSION, node, match, string and key counts
+#   nodes    label (code point), first child, child count, first match, match count
+#            as five columns; node 0 is the root and every node's children sit
+#            next to each other sorted by label (breadth-first order)
+#   matches  form, lemma, part of speech and slot as string ids, four columns
+#   strings  string_count + 1 offsets into the UTF-8 blob that follows
+MAGIC = b'YAWPTRI'
+VERSION = 1
+
+_header = struct.Struct('<7sHIIII3x')
+_NODE_COLUMNS = 5
+_MATCH_COLUMNS = 4
+
+
+def _column(values):
+    column = array('I', values)
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return column.tobytes()
+
+
+class SearchIndex:
+    # Read-only prefix and edit-distance search over the forms of a set of
+    # entries. Queries are normalized first, so whatever normalize() folds
+    # (case, script, diacritics) never counts against a match.
+
+    def __init__(self, path, normalize):
+        self.path = path
+        self.normalize = normalize
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, version, nodes, matches, strings, self._keys = _header.unpack_from(self._view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('{0} is not a version {1} yawp search index'.format(path, VERSION))
+        offset = _header.size
+        columns = []
+        for length in [nodes] * _NODE_COLUMNS + [matches] * _MATCH_COLUMNS + [strings + 1]:
+            columns.append(self._read_column(offset, length))
+            offset += 4 * length
+        (self._labels, self._first_child, self._child_count, self._first_match, self._match_count,
+         self._forms, self._lemmas, self._parts, self._slots, self._offsets) = columns
+        self._blob = offset
+
+    def _read_column(self, offset, length):
+        column = self._view[offset:offset + 4 * length].cast('I')
+        if sys.byteorder != 'little':
+            column = array('I', column)
+            column.byteswap()
+        return column
+
+    @classmethod
+    def build(cls, path, entries, normalize):
+        # entries is an iterable of (word, definitions), e.g. serbocroatian.iter_dump()
+        rows = {}
+        for key, form, lemma, part_of_speech, slot in iter_forms(entries, normalize):
+            rows.setdefault(key, []).append((form, lemma, part_of_speech or '', slot))
+
+        # Nested [children, key] lists, flattened breadth-first below
+        root = [{}, None]
+        for key in rows:
+            node = root
+            for char in key:
+                node = node[0].setdefault(char, [{}, None])
+            node[1] = key
+
+        strings = {}
+        nodes = [[] for _ in range(_NODE_COLUMNS)]
+        matches = [[] for _ in range(_MATCH_COLUMNS)]
+        queue = [(0, root)]
+        for label, (children, key) in queue:
+            nodes[0].append(label)
+            nodes[1].append(len(queue))
+            nodes[2].append(len(children))
+            queue.extend((ord(char), children[char]) for char in sorted(children))
+            found = rows.get(key, []) if key is not None else []
+            nodes[3].append(len(matches[0]))
+            nodes[4].append(len(found))
+            for row in found:
+                for column, value in zip(matches, row):
+                    column.append(strings.setdefault(value, len(strings)))
+
+        blob = [value.encode('utf-8') for value in strings]
+        offsets = [0]
+        for value in blob:
+            offsets.append(offsets[-1] + len(value))
+        if offsets[-1] >= 2 ** 32:
+            raise ValueError('too much text for a search index')
+
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(_header.pack(MAGIC, VERSION, len(queue), len(matches[0]), len(blob), len(rows)))
+            for column in nodes + matches + [offsets]:
+                f.write(_column(column))
+            for value in blob:
+                f.write(value)
+        os.replace(tmp, path)
+        return cls(path, normalize)
+
+    def __len__(self):
+        # Distinct normalized forms
+        return self._keys
+
+    def _string(self, i):
+        start = self._blob + self._offsets[i]
+        return str(self._view[start:self._blob + self._offsets[i + 1]], 'utf-8')
+
+    def _matches(self, node, limit=sys.maxsize):
+        start = self._first_match[node]
+        return [Match(self._string(self._forms[i]), self._string(self._lemmas[i]),
+                      self._string(self._parts[i]), self._string(self._slots[i]))
+                for i in range(start, start + min(self._match_count[node], limit))]
+
+    def _child(self, node, code):
+        low = self._first_child[node]
+        high = low + self._child_count[node]
+        child = bisect_left(self._labels, code, low, high)
+        return child if child < high and self._labels[child] == code else None
+
+    def _find(self, key):
+        node = 0
+        for char in key:
+            node = self._child(node, ord(char))
+            if node is None:
+                return None
+        return node
+
+    def lookup(self, token):
+        node = self._find(self.normalize(token))
+        return self._matches(node) if node is not None else []
+
+    def __contains__(self, token):
+        node = self._find(self.normalize(token))
+        return node is not None and self._match_count[node] > 0
+
+    def prefix(self, token, limit=20):
+        # Forms whose normalized key starts with token's, in key order
+        node = self._find(self.normalize(token))
+        found = []
+        if node is None:
+            return found
+        stack = [node]
+        while stack and len(found) < limit:
+            node = stack.pop()
+            if self._match_count[node]:
+                found.extend(self._matches(node, limit - len(found)))
+            start = self._first_child[node]
+            stack.extend(range(start + self._child_count[node] - 1, start - 1, -1))
+        return found
+
+    def fuzzy(self, token, max_distance=1, limit=20):
+        # Forms within max_distance edits (Levenshtein) of token, nearest first
+        # and then shortest. Follows the trie along token, branching into an
+        # insertion, deletion or substitution while edits are left; once they
+        # are used up the rest of token must match exactly.
+        key = [ord(char) for char in self.normalize(token)]
+        labels, first_child, child_count = self._labels, self._first_child, self._child_count
+        best = {}
+        seen = {}
+        stack = [(0, 0, 0)]
+        while stack:
+            node, i, used = stack.pop()
+            if seen.get((node, i), max_distance + 1) <= used:
+                continue
+            seen[node, i] = used
+            if used == max_distance:
+                for code in key[i:]:
+                    low = first_child[node]
+                    high = low + child_count[node]
+                    node = bisect_left(labels, code, low, high)
+                    if node == high or labels[node] != code:
+                        break
+                else:
+                    if used < best.get(node, max_distance + 1):
+                        best[node] = used
+                continue
+            if i == len(key) and used < best.get(node, max_distance + 1):
+                best[node] = used
+            if i < len(key):
+                stack.append((node, i + 1, used + 1))
+            start = first_child[node]
+            for child in range(start, start + child_count[node]):
+                stack.append((child, i, used + 1))
+                if i < len(key):
+                    stack.append((child, i + 1, used + (labels[child] != key[i])))
+        suggestions = []
+        for node, distance in sorted(best.items(), key=lambda item: (item[1], item[0])):
+            if self._match_count[node]:
+                suggestions.extend(Suggestion(*match, distance) for match in self._matches(node, limit - len(suggestions)))
+                if len(suggestions) >= limit:
+                    break
+        return suggestions
+
+    def lemmas(self, token, max_distance=0):
+        if max_distance:
+            matches = self.fuzzy(token, max_distance, limit=sys.maxsize)
+        else:
+            matches = self.lookup(token)
+        return list(dict.fromkeys(match.lemma for match in matches))
+
+    def close(self):
+        for column in (self._labels, self._first_child, self._child_count, self._first_match, self._match_count,
+                       self._forms, self._lemmas, self._parts, self._slots, self._offsets):
+            if isinstance(column, memoryview):
+                column.release()
+        self._view.release()
+        self._mmap.close()
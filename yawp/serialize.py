@@ -0,0 +1,147 @@
+import struct
+import sys
+from yawp.paradigm import NO_PARADIGM, PARADIGMS, Inflection
+from yawp.wikitext import Example, Meaning, meaning_from_dict, parse_meanings
+
+# Binary definition stream: MAGIC + version, then for every definition a
+# little-endian u32 length followed by one UTF-8 record. A record is its fields
+# joined by FIELD_SEPARATOR:
+#
+#   word, part_of_speech, paradigm name, meaning count, meanings...,
+#   one value per paradigm label (NONE_FIELD when missing), extra label/value pairs...
+#
+# where each meaning is
+#
+#   gloss, label count, labels..., example count, (text, translation or NONE_FIELD)...
+#
+# Splitting one decoded string is much cheaper in Python than walking
+# per-field length prefixes.
+MAGIC = b'YAWPDEF'
+VERSION = 2
+FIELD_SEPARATOR = '\x1f'
+NONE_FIELD = '\x1e'
+
+_header = struct.Struct('<7sH')
+_length = struct.Struct('<I')
+
+
+def write_jsonl(definitions, fp):
+    import json
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    for definition in definitions:
+        fp.write(encode(definition.to_dict()))
+        fp.write('\n')
+
+
+def read_jsonl(fp, cls, paradigms=()):
+    # paradigms are tried in order to find the schema the inflection labels belong to
+    import json
+    for line in fp:
+        if line.strip():
+            yield from_dict(json.loads(line), cls, paradigms)
+
+
+def from_dict(data, cls, paradigms=()):
+    forms = data.get('inflection') or {}
+    paradigm = NO_PARADIGM
+    for label in forms:
+        if label != 'type':
+            paradigm = next((p for p in paradigms if label in p.index), NO_PARADIGM)
+            break
+    if all(isinstance(meaning, str) for meaning in data['meanings']):
+        # Stored before meanings were structured: one raw '#' line per string.
+        # Parsed together so example and translation lines stay with their sense.
+        meanings = parse_meanings('\n'.join(data['meanings']))
+    else:
+        meanings = [meaning_from_dict(meaning) for meaning in data['meanings']]
+    return _make(cls, data['word'], data['part_of_speech'], meanings, Inflection.from_dict(paradigm, forms))
+
+
+def _make(cls, word, part_of_speech, meanings, inflection):
+    # Definitions normally parse themselves from headings; skip that and fill the slots
+    definition = cls.__new__(cls)
+    definition.word = word
+    definition.part_of_speech = part_of_speech
+    definition.meanings = meanings
+    definition.inflection = inflection
+    return definition
+
+
+def encode(definition):
+    inflection = definition.inflection
+    fields = [definition.word, definition.part_of_speech, inflection.paradigm.name, str(len(definition.meanings))]
+    for meaning in definition.meanings:
+        fields.append(meaning.gloss)
+        fields.append(str(len(meaning.labels)))
+        fields.extend(meaning.labels)
+        fields.append(str(len(meaning.examples)))
+        for example in meaning.examples:
+            fields.append(example.text)
+            fields.append(NONE_FIELD if example.translation is None else example.translation)
+    fields.extend(NONE_FIELD if form is None else form for form in inflection.values)
+    if inflection.extra:
+        for label, form in inflection.extra.items():
+            fields.append(label)
+            fields.append(form)
+    record = FIELD_SEPARATOR.join(fields)
+    if record.count(FIELD_SEPARATOR) != len(fields) - 1:
+        raise ValueError('{0!r} contains the field separator'.format(definition.word))
+    return record.encode('utf-8')
+
+
+def decode(record, cls):
+    # record may be a memoryview into a larger buffer; it is decoded in place
+    fields = str(record, 'utf-8').split(FIELD_SEPARATOR)
+    paradigm = PARADIGMS[fields[2]]
+    meanings = []
+    i = 4
+    for _ in range(int(fields[3])):
+        labels_end = i + 2 + int(fields[i + 1])
+        examples_end = labels_end + 1 + 2 * int(fields[labels_end])
+        examples = tuple(Example(fields[j], None if fields[j + 1] == NONE_FIELD else fields[j + 1])
+                         for j in range(labels_end + 1, examples_end, 2))
+        meanings.append(Meaning(fields[i], tuple(map(sys.intern, fields[i + 2:labels_end])), examples))
+        i = examples_end
+    values_end = i + len(paradigm.labels)
+    values = [None if form == NONE_FIELD else form for form in fields[i:values_end]]
+    extra = None
+    if len(fields) > values_end:
+        extra = dict(zip(fields[values_end::2], fields[values_end + 1::2]))
+    return _make(cls, fields[0], fields[1], meanings, Inflection(paradigm, values, extra))
+
+
+def write_records(definitions, fp):
+    fp.write(_header.pack(MAGIC, VERSION))
+    for definition in definitions:
+        fp.write(pack_record(definition))
+
+
+def pack_record(definition):
+    record = encode(definition)
+    return _length.pack(len(record)) + record
+
+
+def iter_records(buffer):
+    # Yields each record as a memoryview slice of buffer (bytes, bytearray or mmap), without copying
+    view = memoryview(buffer)
+    magic, version = _header.unpack_from(view, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a yawp definition stream (version {0})'.format(VERSION))
+    return iter_packed(view[_header.size:])
+
+
+def iter_packed(view):
+    # Records back to back with their length prefixes, as written by pack_record
+    offset = 0
+    end = len(view)
+    unpack = _length.unpack_from
+    while offset < end:
+        length, = unpack(view, offset)
+        offset += _length.size
+        yield view[offset:offset + length]
+        offset += length
+
+
+def read_records(buffer, cls):
+    for record in iter_records(buffer):
+        yield decode(record, cls)
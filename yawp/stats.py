@@ -0,0 +1,72 @@
+import threading
+
+# name -> help text. Counters are exported as <namespace>_<name>_total and
+# timings as Prometheus summaries <namespace>_<name>_seconds_{count,sum}.
+COUNTERS = {
+    'fetches': 'HTTP requests sent to Wiktionary',
+    'bytes_downloaded': 'Response bytes downloaded from Wiktionary',
+    'cache_hits': 'Pages served from the raw cache without a request',
+    'cache_misses': 'Pages that were not fresh in the raw cache',
+    'cache_revalidated': 'Stale cached pages the server confirmed as current',
+    'memo_hits': 'Lookups answered from memoized definitions',
+    'sections_scanned': 'Language sections found on fetched pages',
+    'definitions_built': 'Definitions parsed from wikitext',
+    'unknown_forms': 'Inflection forms with no slot in their paradigm',
+}
+TIMINGS = {
+    'fetch': 'Time spent waiting for Wiktionary responses',
+    'sections': 'Time spent splitting pages into language sections',
+    'definitions': 'Time spent building definitions from a language section',
+}
+
+
+class Stats:
+    # Thread-safe counters and timings, passed as stats= to YAWiktionaryParser.
+    # Code paths check `stats is not None` before touching the clock, so a parser
+    # without stats does no extra work.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = dict.fromkeys(COUNTERS, 0)
+            self.timings = {name: [0, 0.0] for name in TIMINGS}
+
+    def add(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            timing = self.timings.setdefault(name, [0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+
+    def snapshot(self):
+        # {'counters': {name: value}, 'timings': {name: (count, seconds)}}
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'timings': {name: tuple(timing) for name, timing in self.timings.items()},
+            }
+
+    def to_prometheus(self, namespace='yawp'):
+        # Text exposition format, ready to serve from a /metrics endpoint
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot['counters'].items()):
+            metric = '{0}_{1}_total'.format(namespace, name)
+            if name in COUNTERS:
+                lines.append('# HELP {0} {1}'.format(metric, COUNTERS[name]))
+            lines.append('# TYPE {0} counter'.format(metric))
+            lines.append('{0} {1}'.format(metric, value))
+        for name, (count, seconds) in sorted(snapshot['timings'].items()):
+            metric = '{0}_{1}_seconds'.format(namespace, name)
+            if name in TIMINGS:
+                lines.append('# HELP {0} {1}'.format(metric, TIMINGS[name]))
+            lines.append('# TYPE {0} summary'.format(metric))
+            lines.append('{0}_count {1}'.format(metric, count))
+            lines.append('{0}_sum {1!r}'.format(metric, seconds))
+        return '\n'.join(lines) + '\n'
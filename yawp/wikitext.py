@@ -0,0 +1,188 @@
+import re
+import sys
+from collections import namedtuple
+from yawp.lazy import LazyRegex
+
+# A sense line (#, ##, ...) with its labels and the example lines under it
+Meaning = namedtuple('Meaning', ['gloss', 'labels', 'examples'])
+Example = namedtuple('Example', ['text', 'translation'])
+
+# Every piece of inline markup the cleaner acts on. Text between matches is
+# copied through untouched, so a line is scanned once from left to right. A
+# template or link with nothing nested inside it (nearly all of them) is
+# matched whole; nested ones are taken apart bracket by bracket.
+_token_regex = LazyRegex(r"(?P<template>\{\{[^{}\[\]]*\}\})|(?P<link>\[\[[^{}\[\]]*\]\])"
+                         r"|\{\{|\}\}|\[\[|\]\]|\||'''|''|<!--.*?(?:-->|$)", re.RegexFlag.DOTALL)
+_named_regex = LazyRegex(r"^\s*([\w-]+)\s*=(.*)$", re.RegexFlag.DOTALL)
+
+# Label arguments that only join the labels around them
+_LABEL_JOINERS = {'_', 'and', 'or'}
+_LINK_NAMESPACES = ('category:', 'file:', 'image:', 'w:', 'wikipedia:')
+
+
+def _labels(args, named, found):
+    # Labels repeat across thousands of senses; keep one copy of each
+    found['labels'].extend(sys.intern(arg) for arg in args[1:] if arg and arg not in _LABEL_JOINERS)
+    return ''
+
+def _gloss(args, named, found):
+    return '(' + args[0] + ')' if args else ''
+
+def _qualifier(args, named, found):
+    return '(' + ', '.join(arg for arg in args if arg) + ')' if args else ''
+
+def _term(args, named, found):
+    # {{l|sh|term|alt|gloss}}: the alternative display form wins over the term
+    if len(args) > 2 and args[2]:
+        return args[2]
+    return args[1] if len(args) > 1 else ''
+
+def _first(args, named, found):
+    return args[0] if args else ''
+
+def _last(args, named, found):
+    return args[-1] if args else ''
+
+def _usage_example(args, named, found):
+    # {{ux|sh|example|translation}}
+    translation = named.get('t') or named.get('translation') or (args[2] if len(args) > 2 else None)
+    if translation:
+        found['translation'] = translation
+    return args[1] if len(args) > 1 else ''
+
+def _form_of(args, named, found):
+    # {{alternative form of|sh|word}} -> 'alternative form of word'
+    return found['template'] + ' ' + _term(args, named, found)
+
+# Template name -> handler(positional args, named args, found) returning the
+# text the template stands for. Anything else is dropped.
+TEMPLATES = {
+    'lb': _labels, 'lbl': _labels, 'label': _labels, 'term-label': _labels, 'tlb': _labels,
+    'gloss': _gloss, 'gl': _gloss,
+    'q': _qualifier, 'qual': _qualifier, 'qualifier': _qualifier, 'i': _qualifier, 'sense': _qualifier, 's': _qualifier,
+    'l': _term, 'll': _term, 'l-self': _term, 'm': _term, 'mention': _term, 'link': _term,
+    'w': _last, 'vern': _first, 'taxlink': _first,
+    'non-gloss definition': _first, 'n-g': _first, 'ngd': _first,
+    'ux': _usage_example, 'uxi': _usage_example,
+    'alternative form of': _form_of, 'alt form': _form_of, 'abbreviation of': _form_of,
+    'diminutive of': _form_of, 'augmentative of': _form_of, 'synonym of': _form_of,
+    'feminine of': _form_of, 'imperfective of': _form_of, 'perfective of': _form_of,
+    'inflection of': _form_of, 'form of': _form_of,
+}
+
+
+def clean(text, found=None):
+    # Resolves [[links]] and {{templates}} and strips bold/italic quotes and
+    # comments in one pass. Labels and example translations the templates carry
+    # go to found['labels'] / found['translation'] when found is given.
+    if '{' not in text and '[' not in text and "'" not in text and '<' not in text:
+        return ' '.join(text.split())
+    if found is None:
+        found = {'labels': [], 'translation': None}
+    # Open {{ and [[ frames as (opener, args), every argument a list of text
+    # pieces; pieces outside any frame go straight to out
+    frames = []
+    out = []
+    position = 0
+    for match in _token_regex.finditer(text):
+        token = match.group()
+        pieces = frames[-1][1][-1] if frames else out
+        if match.start() > position:
+            pieces.append(text[position:match.start()])
+        position = match.end()
+        kind = match.lastgroup
+        if kind is not None:
+            inner = token[2:-2]
+            if "''" in inner:
+                inner = inner.replace("'''", '').replace("''", '')
+            pieces.append(_template(inner.split('|'), found) if kind == 'template' else _link(inner.split('|')))
+        elif token == '{{' or token == '[[':
+            frames.append((token, [[]]))
+        elif frames and ((token == '}}' and frames[-1][0] == '{{') or (token == ']]' and frames[-1][0] == '[[')):
+            opener, args = frames.pop()
+            args = [''.join(arg) for arg in args]
+            resolved = _template(args, found) if opener == '{{' else _link(args)
+            (frames[-1][1][-1] if frames else out).append(resolved)
+        elif token == '|' and frames:
+            frames[-1][1].append([])
+        elif token[0] == "'" or token.startswith('<!--'):
+            pass
+        else:
+            # A stray }} or ]], or a | outside any frame, is plain text
+            pieces.append(token)
+    (frames[-1][1][-1] if frames else out).append(text[position:])
+    while frames:
+        # Unclosed markup is kept as the text it contained
+        opener, args = frames.pop()
+        (frames[-1][1][-1] if frames else out).append('|'.join(''.join(arg) for arg in args))
+    return ' '.join(''.join(out).split())
+
+
+def _template(args, found):
+    name = args[0].strip()
+    handler = TEMPLATES.get(name)
+    if handler is None:
+        return ''
+    positional = []
+    named = {}
+    for arg in args[1:]:
+        match = _named_regex.match(arg) if '=' in arg else None
+        if match:
+            named[match.group(1)] = match.group(2).strip()
+        else:
+            positional.append(arg.strip())
+    found['template'] = name
+    return handler(positional, named, found)
+
+
+def _link(args):
+    target = args[0].strip()
+    if target.lower().startswith(_LINK_NAMESPACES) and not target.startswith(':'):
+        # Category and file links are page metadata; w: links show their label
+        return args[-1] if target.lower().startswith(('w:', 'wikipedia:')) and len(args) > 1 else ''
+    if len(args) > 1:
+        return args[-1]
+    return target.lstrip(':').split('#', 1)[0]
+
+
+def parse_meanings(text):
+    # Turns the #-lines of a part of speech section into Meanings:
+    #   #, ##      a sense (## is a sub-sense, kept as its own Meaning)
+    #   #:, ##:    an example of the sense above
+    #   #::        the translation of the example above
+    #   #*, #*:    a quotation (its citation line and its text)
+    meanings = []
+    gloss = labels = examples = None
+    for line in text.splitlines():
+        if not line.startswith('#'):
+            continue
+        rest = line.lstrip('#*:')
+        marks = line[:len(line) - len(rest)].lstrip('#')
+        found = {'labels': [], 'translation': None}
+        content = clean(rest, found)
+        if not marks:
+            if gloss is not None:
+                meanings.append(Meaning(gloss, tuple(labels), tuple(examples)))
+            gloss, labels, examples = content, found['labels'], []
+        elif gloss is None or not content:
+            continue
+        elif marks == '::' and examples:
+            examples[-1] = Example(examples[-1].text, content)
+        elif marks in (':', '*', '*:'):
+            examples.append(Example(content, found['translation']))
+    if gloss is not None:
+        meanings.append(Meaning(gloss, tuple(labels), tuple(examples)))
+    return meanings
+
+
+def meaning_to_dict(meaning):
+    return {
+        'gloss': meaning.gloss,
+        'labels': list(meaning.labels),
+        'examples': [{'text': example.text, 'translation': example.translation} for example in meaning.examples],
+    }
+
+
+def meaning_from_dict(data):
+    return Meaning(data['gloss'], tuple(data.get('labels') or ()),
+                   tuple(Example(e['text'], e.get('translation')) for e in data.get('examples') or ()))